@@ -1,5 +1,4 @@
 import os
-import random
 import pandas as pd
 import numpy as np
 import shap
@@ -13,12 +12,23 @@ import uuid
 import pickle
 import json
 from datetime import datetime
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context, send_file, send_from_directory, g, after_this_request
 from catboost import CatBoostClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import LabelEncoder
 import shap
 from flask_cors import CORS
+from model_router import ServedModel, ModelRouter, load_served_model
+from chat_engine import ChatEngine
+from booking_service import BookingService, SlotTakenError, InvalidBookingError
+from export_stream import EXPORT_FORMATS, export_stream
+from feature_store import build_input_frame, feature_columns
+from micro_batcher import MicroBatcher
+from report_service import ReportService
+from lifecycle import WarmupTracker
+from registry_store import ParquetRegistry, to_display_frame
+from profiling import ProfileManager
+from compact_tables import DoctorDirectory, load_registry, to_json_records, DOCTOR_COLUMNS, REGISTRY_FEATURES, REGISTRY_COLUMNS
 app = Flask(__name__)
 app.secret_key = 'supersecretkey'
 CORS(app, resources={r"/api/*": {"origins": "*"}}, supports_credentials=True)
@@ -29,7 +39,7 @@ def handle_preflight():
         res = app.make_default_options_response()
         res.headers["Access-Control-Allow-Origin"] = "*"
         res.headers["Access-Control-Allow-Methods"] = "GET, POST, OPTIONS, PUT, DELETE"
-        res.headers["Access-Control-Allow-Headers"] = "Content-Type, Authorization"
+        res.headers["Access-Control-Allow-Headers"] = "Content-Type, Authorization, Idempotency-Key"
         return res
 
 # ==========================================
@@ -40,9 +50,39 @@ DB_FILE = os.path.join(BASE_DIR, 'doctors_database.csv')
 MODEL_FILE = os.path.join(BASE_DIR, 'lung_cancer_model.pkl')
 DATA_FILE = os.path.join(BASE_DIR, 'cancer patient datasets.csv')
 
+# --- CANDIDATE MODELS (A/B + SHADOW) ---
+CANDIDATE_MODELS = {
+    'ensemble': os.path.join(BASE_DIR, 'lungvision_ensemble_model.pkl'),
+    'final': os.path.join(BASE_DIR, 'lungvision_model_final.pkl'),
+}
+ROUTING_MODE = os.environ.get('LV_ROUTING_MODE', 'off')      # off | ab | shadow
+CANDIDATE_NAME = os.environ.get('LV_CANDIDATE_MODEL', 'ensemble')
+AB_SHARE = float(os.environ.get('LV_AB_SHARE', '0.1'))        # Share of traffic served by the candidate in 'ab' mode
+
+# --- MICRO-BATCHING (0 ms window disables it) ---
+BATCH_WINDOW_MS = float(os.environ.get('LV_BATCH_WINDOW_MS', '2'))
+BATCH_MAX_ROWS = int(os.environ.get('LV_BATCH_MAX_ROWS', '64'))
+BATCH_TIMEOUT_S = float(os.environ.get('LV_BATCH_TIMEOUT_S', '10'))
+
 # --- DEFINING REGISTRY FILES ---
 PATIENT_REGISTRY = os.path.join(BASE_DIR, 'patient_registry.csv')
 HOSPITAL_RECORDS = os.path.join(BASE_DIR, 'hospital_records.csv')
+CHAT_KB_FILE = os.path.join(BASE_DIR, 'chatbot_knowledge.csv')
+REPORT_CACHE_DIR = os.path.join(BASE_DIR, 'report_cache')
+REGISTRY_STORE_DIR = os.path.join(BASE_DIR, 'registry_store')
+REGISTRY_BACKEND = os.environ.get('LV_REGISTRY_BACKEND', 'csv')  # csv | parquet
+REGISTRY_COMPACT_S = float(os.environ.get('LV_REGISTRY_COMPACT_S', '300'))  # Parquet compaction timer, 0 = CLI only
+
+# --- PROFILING (opt-in: admin endpoints stay disabled without a token) ---
+PROFILE_DIR = os.path.join(BASE_DIR, 'profiles')
+ADMIN_TOKEN = os.environ.get('LV_ADMIN_TOKEN', '')
+PROFILE_SAMPLE_HZ = float(os.environ.get('LV_PROFILE_SAMPLE_HZ', '0'))  # Background sampler, e.g. 10
+
+# --- WARM-UP ---
+# Single-instance deployments (e.g. a Render cold start) have no readiness-aware
+# load balancer, so /api/predict waits this long for the model before giving up
+WARMUP_WAIT_S = float(os.environ.get('LV_WARMUP_WAIT_S', '30'))
+WARMUP_RETRY_AFTER_S = 5
 
 # --- GENERATE MOCK DATABASE IF MISSING ---
 def create_mock_database():
@@ -67,6 +107,7 @@ model = None
 explainer = None
 le = LabelEncoder()
 ALL_FEATURES = []
+router = None
 
 def load_model():
     global model, explainer, le, ALL_FEATURES
@@ -89,22 +130,99 @@ def load_model():
         explainer = None
         ALL_FEATURES = []
 
-load_model()
+def predict_batch(batch_inputs):
+    # One predict_proba + one SHAP call for every request that arrived in the window
+    batch_df = pd.DataFrame([[d[f] for f in ALL_FEATURES] for d in batch_inputs], columns=ALL_FEATURES)
+    probs = model.predict_proba(batch_df)
+    codes = np.asarray(model.classes_)[probs.argmax(axis=1)]
+    shap_values = explainer(batch_df)
+    return [
+        (le.inverse_transform([int(code)])[0], probs[i], shap_values[i:i + 1])
+        for i, code in enumerate(codes)
+    ]
+
+def load_router():
+    global router
+    if model is None:
+        router = None
+        return
+    batcher = None
+    if BATCH_WINDOW_MS > 0 and explainer is not None:
+        batcher = MicroBatcher(predict_batch, max_batch=BATCH_MAX_ROWS, max_wait_ms=BATCH_WINDOW_MS,
+                               timeout_s=BATCH_TIMEOUT_S, name='predict-batcher')
+    primary = ServedModel('catboost', model, ALL_FEATURES, le, batcher=batcher)
+    candidate = None
+    candidate_file = CANDIDATE_MODELS.get(CANDIDATE_NAME)
+    if ROUTING_MODE != 'off' and candidate_file and os.path.exists(candidate_file):
+        try:
+            candidate = load_served_model(CANDIDATE_NAME, candidate_file)
+            print(f"Candidate model '{CANDIDATE_NAME}' loaded ({ROUTING_MODE} mode)")
+        except Exception as e:
+            print(f"Error loading candidate model '{CANDIDATE_NAME}': {e}")
+    try:
+        router = ModelRouter(primary, candidate, mode=ROUTING_MODE, ab_share=AB_SHARE)
+    except ValueError as e:
+        print(f"Routing disabled: {e}")
+        router = ModelRouter(primary)
+
+def check_feature_alignment():
+    # The served model and the training feature store must agree on the columns AND their order.
+    # When they do, serving takes its column list from the store; otherwise the model's own order wins.
+    global ALL_FEATURES
+    try:
+        store_features = feature_columns(DATA_FILE)
+    except Exception as e:
+        print(f"Feature store unavailable, skipping alignment check: {e}")
+        return
+    if not ALL_FEATURES:
+        return
+    if list(store_features) == list(ALL_FEATURES):
+        ALL_FEATURES = list(store_features)
+    elif set(store_features) == set(ALL_FEATURES):
+        print(f"⚠️ Feature order mismatch! Model: {ALL_FEATURES} vs feature store: {store_features}. Serving in model order.")
+    else:
+        print(f"⚠️ Feature mismatch! Model: {sorted(set(ALL_FEATURES) ^ set(store_features))} differ from the feature store.")
+
 
 # --- LOAD DOCTOR DATABASE ---
-doctor_db = pd.DataFrame()
+# Compact dtypes (categoricals, float32) and JSON rows prepared once at startup
+doctor_db = DoctorDirectory(pd.DataFrame(columns=DOCTOR_COLUMNS))
 try:
     if os.path.exists(DB_FILE):
-        doctor_db = pd.read_csv(DB_FILE)
+        doctor_db = DoctorDirectory.from_csv(DB_FILE)
         print(f"Doctor Database Loaded. {len(doctor_db)} doctors found.")
     else:
         print(f"Doctor Database not found at {DB_FILE}")
         create_mock_database()
-        doctor_db = pd.read_csv(DB_FILE)
+        doctor_db = DoctorDirectory.from_csv(DB_FILE)
 except Exception as e:
     print(f"Error loading doctor database: {e}")
-    # Create an empty DataFrame with expected columns to avoid crashes later
-    doctor_db = pd.DataFrame(columns=["ID", "Name", "Specialty", "Hospital", "Location", "Rating", "ImageURL"])
+
+# --- REGISTRY STORAGE BACKEND ---
+registry_store = None
+if REGISTRY_BACKEND == 'parquet':
+    try:
+        registry_store = ParquetRegistry(REGISTRY_STORE_DIR)
+        if REGISTRY_COMPACT_S > 0:
+            registry_store.start_compactor(REGISTRY_COMPACT_S)
+        print(f"Registry backend: Parquet ({REGISTRY_STORE_DIR})")
+    except ImportError as e:
+        print(f"{e}. Falling back to {PATIENT_REGISTRY}")
+
+# --- BOOKING INDEX (rebuilt from hospital_records.csv) ---
+booking_service = BookingService(HOSPITAL_RECORDS)
+
+# --- PDF REPORTS (rendered on demand in a process pool) ---
+report_service = ReportService(REPORT_CACHE_DIR)
+
+# --- PROFILING HOOKS ---
+profile_manager = None
+if ADMIN_TOKEN or PROFILE_SAMPLE_HZ > 0:
+    profile_manager = ProfileManager(PROFILE_DIR, os.path.abspath(__file__), background_hz=PROFILE_SAMPLE_HZ,
+                                     worker_threads=('predict-batcher',))
+
+# --- LOAD CHATBOT KNOWLEDGE BASE ---
+chat_engine = ChatEngine.from_csv(CHAT_KB_FILE)
 
 # ==========================================
 # 2. INTELLIGENCE LOGIC
@@ -162,36 +280,101 @@ def generate_recommendations(inputs):
 
     return recs
 
+def render_shap_plot(shap_values, input_df, class_idx):
+    """Dark-themed SHAP bar chart as a base64 PNG ('' if it fails)."""
+    try:
+        plt.figure(figsize=(12, 6)) # Wider for horizontal emphasis
+        shap.summary_plot(shap_values[:, :, class_idx], input_df, show=False, plot_type="bar", color='#00f2c3')
+        plt.title('Feature Importance (Deep Logic)', color='white')
+        plt.xlabel('SHAP Value (Impact on Prediction)', color='white') # Explicit X label
+
+        # Dark Theme Customization for Plot
+        ax = plt.gca()
+        ax.set_facecolor('#1e1e2f')
+        plt.gcf().set_facecolor('#1e1e2f')
+        ax.tick_params(colors='white', which='both')
+        ax.xaxis.label.set_color('white')
+        ax.yaxis.label.set_color('white')
+        for spine in ax.spines.values():
+            spine.set_edgecolor('#444')
+
+        img = io.BytesIO()
+        plt.savefig(img, format='png', bbox_inches='tight', transparent=False)
+        img.seek(0)
+        plot_url = base64.b64encode(img.getvalue()).decode()
+        plt.close()
+        return plot_url
+    except Exception as plot_err:
+        print(f"Plot Error: {plot_err}")
+        return ""
+
+# ==========================================
+# 3. STARTUP WARM-UP (background thread)
+# ==========================================
+# Port binds immediately; the model, explainer and first plot are warmed here
+# so /api/ready only turns green once a request will hit steady-state latency.
+def warm_dummy_input():
+    dummy = {f: 1 for f in ALL_FEATURES}
+    if 'Age' in dummy: dummy['Age'] = 30
+    if 'Years of Smoking' in dummy: dummy['Years of Smoking'] = 0
+    return dummy
+
+def warm_load_model():
+    load_model()
+    if model is None:
+        raise RuntimeError(f"Model could not be loaded from {MODEL_FILE}")
+    check_feature_alignment()
+    load_router()
+
+def warm_inference():
+    # Goes through the batcher (if enabled) so its worker thread is warm too
+    router.primary.predict(warm_dummy_input())
+
+def warm_plot():
+    input_df = build_input_frame(warm_dummy_input(), ALL_FEATURES)
+    if not render_shap_plot(explainer(input_df), input_df, 0):
+        raise RuntimeError("Warm-up plot render failed")
+
+warmup = WarmupTracker(['model', 'inference', 'plot'])
+warmup.start([
+    ('model', warm_load_model, True),
+    ('inference', warm_inference, True),
+    ('plot', warm_plot, False),  # Plots are best-effort in /api/predict as well
+])
+
+@app.before_request
+def start_request_profile():
+    if profile_manager is None or not ADMIN_TOKEN:
+        return
+    # "X-Profile: cprofile|sampling" profiles this one request (admin token required)
+    header_mode = request.headers.get('X-Profile') if request.headers.get('X-Admin-Token') == ADMIN_TOKEN else None
+    mode = profile_manager.claim(request.path, header_mode)
+    if mode:
+        g.profile_handle = profile_manager.begin(mode)
+
+@app.after_request
+def finish_request_profile(response):
+    handle = g.pop('profile_handle', None)
+    if handle is not None:
+        try:
+            response.headers['X-Profile-Id'] = profile_manager.end(handle, request.path)
+        except Exception as e:
+            print(f"Profile Error: {e}")
+    return response
+
 @app.route('/api/book', methods=['POST'])
 def api_book_appointment():
     try:
         data = request.json
-        txn_id = f"TXN-{random.randint(10000,99999)}"
-        
-        full_record = {
-            'Timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            'Transaction ID': txn_id,
-            'Payment Status': 'Payment Successful',
-            'Patient Name': data.get('patientName'),
-            'Diagnosis': data.get('diagnosis'),
-            'Confidence': f"{data.get('confidence')}%",
-            'Doctor Name': data.get('doctorName'),
-            'Specialty': data.get('specialty'),
-            'Appt Date': data.get('date'),
-            'Appt Time': data.get('time'),
-            'Fee Paid': data.get('amount'),
-            'Payment Method': data.get('paymentMethod')
-        }
-        
-        record_df = pd.DataFrame([full_record])
-        if not os.path.exists(HOSPITAL_RECORDS):
-            record_df.to_csv(HOSPITAL_RECORDS, index=False)
-        else:
-            record_df.to_csv(HOSPITAL_RECORDS, mode='a', header=False, index=False)
-            
+        idempotency_key = request.headers.get('Idempotency-Key') or data.get('idempotencyKey')
+        result = booking_service.book(data, idempotency_key=idempotency_key)
         print(f"Hospital Record Saved for {data.get('patientName')}")
-        return {"success": True, "transactionId": txn_id}
+        return result
 
+    except InvalidBookingError as e:
+        return {"error": str(e)}, 400
+    except SlotTakenError as e:
+        return {"error": str(e)}, 409
     except Exception as e:
         print(f"Error Saving Hospital Record: {e}")
         return {"error": str(e)}, 500
@@ -200,8 +383,13 @@ def api_predict():
     try:
         print(f"[{datetime.now().time()}] Received prediction request", flush=True)
         
-        if model is None:
-            return {"error": "Model not loaded. Please contact support."}, 503
+        if model is None or router is None:
+            warmup.wait_for('model', WARMUP_WAIT_S)
+            if model is None or router is None:
+                if warmup.snapshot()['failed']:
+                    return {"error": "Model not loaded. Please contact support."}, 503
+                return ({"error": "The service is warming up. Please retry in a few seconds.", "status": "warming_up"},
+                        503, {"Retry-After": str(WARMUP_RETRY_AFTER_S)})
 
         data = request.json
         if not data:
@@ -250,18 +438,14 @@ def api_predict():
             
             input_data[f] = val
 
-        data_values = [input_data[f] for f in ALL_FEATURES]
-        input_df = pd.DataFrame([data_values], columns=ALL_FEATURES)
+        input_df = build_input_frame(input_data, ALL_FEATURES)
         
         print("Running prediction...", flush=True)
-        # Predict
-        pred_code = model.predict(input_df)[0]
-        if isinstance(pred_code, (list, np.ndarray)): pred_code = pred_code[0]
-        result = le.inverse_transform([int(pred_code)])[0]
-        
-        probs = model.predict_proba(input_df)[0]
+        # Predict (the router may hand this request to the A/B candidate)
+        served_by, result, probs, shap_values = router.predict(input_data)
+        pred_code = le.transform([result])[0]
         confidence = round(float(max(probs)) * 100, 2)
-        print(f"Prediction done: {result} ({confidence}%)", flush=True)
+        print(f"Prediction done: {result} ({confidence}%) via {served_by}", flush=True)
         
         # Intel
         diet, css_class = get_intel_and_colors(result)
@@ -275,11 +459,20 @@ def api_predict():
             if result == 'Medium': class_idx = 1
             elif result == 'High': class_idx = 2
 
-        shap_values = explainer(input_df)
-        sv = shap_values[0, :, class_idx]
-        
-        feature_impacts = [{'name': n, 'impact': i, 'val': v} for n, i, v in zip(ALL_FEATURES, sv.values, sv.data)]
-        feature_impacts.sort(key=lambda x: x['impact'], reverse=True)
+        # The SHAP explainer belongs to the primary model; using it for a label the
+        # A/B candidate produced would explain the wrong model, so those get none
+        explained = served_by == router.primary.name
+        explanation_note = None
+        if explained:
+            if shap_values is None:
+                # Not batched: explain this row on its own
+                shap_values = explainer(input_df)
+            sv = shap_values[0, :, class_idx]
+            feature_impacts = [{'name': n, 'impact': i, 'val': v} for n, i, v in zip(ALL_FEATURES, sv.values, sv.data)]
+            feature_impacts.sort(key=lambda x: x['impact'], reverse=True)
+        else:
+            feature_impacts = []
+            explanation_note = f"No feature explanation: this prediction was served by the '{served_by}' candidate model."
         
         # Radar Data
         radar_feats = ['Smoking', 'Alcohol use', 'Obesity', 'Balanced Diet', 'Air Pollution']
@@ -296,44 +489,14 @@ def api_predict():
         chart_values = [round(x['impact'], 3) for x in sorted_by_mag]
         
         # --- GENERATE PLOT ---
+        # Clients that only want the PDF report can skip the inline PNG with "includePlot": false
         plot_url = ""
-        try:
-            plt.figure(figsize=(12, 6)) # Wider for horizontal emphasis
-            shap.summary_plot(shap_values[:, :, class_idx], input_df, show=False, plot_type="bar", color='#00f2c3')
-            plt.title('Feature Importance (Deep Logic)', color='white')
-            plt.xlabel('SHAP Value (Impact on Prediction)', color='white') # Explicit X label
-            
-            # Dark Theme Customization for Plot
-            ax = plt.gca()
-            ax.set_facecolor('#1e1e2f')
-            plt.gcf().set_facecolor('#1e1e2f')
-            ax.tick_params(colors='white', which='both')
-            ax.xaxis.label.set_color('white')
-            ax.yaxis.label.set_color('white')
-            for spine in ax.spines.values():
-                spine.set_edgecolor('#444')
-
-            img = io.BytesIO()
-            plt.savefig(img, format='png', bbox_inches='tight', transparent=False)
-            img.seek(0)
-            plot_url = base64.b64encode(img.getvalue()).decode()
-            plt.close()
-        except Exception as plot_err:
-            print(f"Plot Error: {plot_err}")
+        if explained and data.get('includePlot', True) is not False:
+            plot_url = render_shap_plot(shap_values, input_df, class_idx)
 
         # --- SAVE TO REGISTRY ---
         try:
-            # Explicitly define columns to match patient_registry.csv header
-            # Header: Timestamp,Patient Name,Diagnosis,Confidence Score,<Features>,Name,GenderStr
-            # Features list (excluding Years of Smoking which is in ALL_FEATURES but not in registry)
-            REGISTRY_FEATURES = [
-                'Age', 'Gender', 'Air Pollution', 'Alcohol use', 'Dust Allergy', 'OccuPational Hazards',
-                'Genetic Risk', 'chronic Lung Disease', 'Balanced Diet', 'Obesity', 'Smoking', 
-                'Passive Smoker', 'Chest Pain', 'Coughing of Blood', 'Fatigue', 'Weight Loss', 
-                'Shortness of Breath', 'Wheezing', 'Swallowing Difficulty', 'Clubbing of Finger Nails', 
-                'Frequent Cold', 'Dry Cough', 'Snoring'
-            ]
-            
+            # Column order matches the patient_registry.csv header (see compact_tables.REGISTRY_COLUMNS)
             registry_record = {
                 'Timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
                 'Patient Name': data.get('name', 'Unknown'),
@@ -349,10 +512,11 @@ def api_predict():
             registry_record['GenderStr'] = 'Male' if input_data.get('Gender') == 1 else 'Female'
             
             # Create DataFrame with explicit column order
-            ordered_cols = ['Timestamp', 'Patient Name', 'Diagnosis', 'Confidence Score'] + REGISTRY_FEATURES + ['Name', 'GenderStr']
-            reg_df = pd.DataFrame([registry_record], columns=ordered_cols)
+            reg_df = pd.DataFrame([registry_record], columns=REGISTRY_COLUMNS)
             
-            if not os.path.exists(PATIENT_REGISTRY):
+            if registry_store is not None:
+                registry_store.append(registry_record)
+            elif not os.path.exists(PATIENT_REGISTRY):
                 reg_df.to_csv(PATIENT_REGISTRY, index=False)
             else:
                 reg_df.to_csv(PATIENT_REGISTRY, mode='a', header=False, index=False)
@@ -362,22 +526,44 @@ def api_predict():
         except Exception as reg_err:
             print(f"Registry Update Failed: {reg_err}")
 
+        if router.mode == 'shadow' and explained:
+            # Candidate runs only once the response has gone out, not alongside SHAP/plot/registry work
+            @after_this_request
+            def queue_shadow(response):
+                response.call_on_close(lambda: router.schedule_shadow(input_data, result))
+                return response
+
         return {
             "prediction": result,
             "confidence": confidence,
             "diet": diet,
             "recommendations": recs,
             "plot_url": plot_url,
+            "model": served_by,
+            "explanation_note": explanation_note,
             "dashboard": {
                 "radar": {"labels": radar_feats, "data": radar_data},
                 "bar": {"labels": chart_labels, "data": chart_values},
-                "base_value": round(explainer.expected_value[class_idx], 3)
+                "base_value": round(float(explainer.expected_value[class_idx]), 3) if explained else None
             }
         }
     except Exception as e:
         print(f"API Error: {e}")
         return {"error": str(e)}, 500
 
+@app.route('/api/report', methods=['POST'])
+def api_report():
+    try:
+        result = request.json
+        if not result or 'prediction' not in result:
+            return {"error": "Send the /api/predict response to build a report"}, 400
+        key, pdf = report_service.get_pdf(result)
+        return send_file(pdf, mimetype='application/pdf', as_attachment=True,
+                         download_name=f"LungVision-Report-{key[:8]}.pdf")
+    except Exception as e:
+        print(f"Report Error: {e}")
+        return {"error": str(e)}, 500
+
 @app.route('/api/doctors', methods=['GET'])
 def api_get_doctors():
     try:
@@ -387,25 +573,48 @@ def api_get_doctors():
         elif risk_level == 'Medium': targets = ['Pulmonologist', 'Internal Medicine']
         elif risk_level == 'Low': targets = ['General Physician', 'Internal Medicine']
         
-        docs = doctor_db
-        if targets:
-            docs = doctor_db[doctor_db['Specialty'].isin(targets)]
-            
-        # Replace NaN with None to ensure valid JSON (NaN -> null)
-        docs = docs.astype(object).where(pd.notnull(docs), None)
-        
-        return docs.to_dict(orient='records')
+        return doctor_db.find(targets)
     except Exception as e:
         return {"error": str(e)}, 500
 
+def registry_query_args():
+    # ?diagnosis=High,Medium&start=2026-01-01&end=2026-02-01&columns=Timestamp,Diagnosis
+    diagnosis = [d for d in request.args.get('diagnosis', '').split(',') if d]
+    columns = [c for c in request.args.get('columns', '').split(',') if c in REGISTRY_COLUMNS]
+    return {
+        'diagnosis': diagnosis or None,
+        'start': request.args.get('start') or None,
+        'end': request.args.get('end') or None,
+        'columns': columns or None,
+    }
+
+def filter_registry_frame(df, diagnosis=None, start=None, end=None):
+    # CSV backend: same filters as the Parquet pushdown, applied after the read
+    if diagnosis and 'Diagnosis' in df.columns:
+        df = df[df['Diagnosis'].isin(diagnosis)]
+    if (start or end) and 'Timestamp' in df.columns:
+        ts = pd.to_datetime(df['Timestamp'], errors='coerce')
+        if start: df = df[ts >= pd.Timestamp(start)]
+        if end: df = df[ts <= pd.Timestamp(end)]
+    return df
+
 @app.route('/api/registry', methods=['GET'])
 def api_get_registry():
     try:
+        query = registry_query_args()
+        if registry_store is not None:
+            df = to_display_frame(registry_store.read(**query))
+            return to_json_records(df)
         if os.path.exists(PATIENT_REGISTRY):
-            df = pd.read_csv(PATIENT_REGISTRY)
-            # Replace NaN with None (null in JSON)
-            df = df.where(pd.notnull(df), None)
-            return df.to_dict(orient='records')
+            usecols = query['columns']
+            if usecols and (query['diagnosis'] or query['start'] or query['end']):
+                usecols = list(dict.fromkeys(usecols + ['Diagnosis', 'Timestamp']))
+            df = load_registry(PATIENT_REGISTRY, usecols=usecols)
+            df = filter_registry_frame(df, query['diagnosis'], query['start'], query['end'])
+            if query['columns']:
+                df = df[query['columns']]
+            # Replace NaN/NA with None (null in JSON)
+            return to_json_records(df)
         return []
     except Exception as e:
         print(f"Error fetching registry: {e}")
@@ -424,35 +633,120 @@ def api_get_hospital_records():
         print(f"Error fetching hospital records: {e}")
         return {"error": str(e)}, 500
 
+def stream_export(path, name, frames=None):
+    try:
+        fmt = request.args.get('format', 'ndjson')
+        offset = int(request.args.get('offset', 0))
+        byte_offset = int(request.args.get('byte_offset', 0))
+        use_gzip = 'gzip' in request.headers.get('Accept-Encoding', '') and request.args.get('gzip', '1') != '0'
+        blocks = export_stream(path, fmt, offset=offset, byte_offset=byte_offset, gzip=use_gzip, frames=frames)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+
+    res = Response(stream_with_context(blocks), mimetype=EXPORT_FORMATS[fmt])
+    res.headers['Content-Disposition'] = f'attachment; filename="{name}.{fmt}"'
+    if use_gzip:
+        res.headers['Content-Encoding'] = 'gzip'
+        res.headers['Vary'] = 'Accept-Encoding'
+    return res
+
+@app.route('/api/export/registry', methods=['GET'])
+def api_export_registry():
+    if registry_store is not None:
+        # Filters/columns are pushed down to the Parquet scan; batches stream straight out
+        frames = (to_display_frame(f) for f in registry_store.iter_frames(**registry_query_args()))
+        return stream_export(PATIENT_REGISTRY, 'patient_registry', frames=frames)
+    return stream_export(PATIENT_REGISTRY, 'patient_registry')
+
+@app.route('/api/export/hospital-records', methods=['GET'])
+def api_export_hospital_records():
+    return stream_export(HOSPITAL_RECORDS, 'hospital_records')
+
 @app.route('/api/chat', methods=['POST'])
 def api_chat_message():
     try:
-        user_msg = request.json.get('message', '').lower()
-        knowledge_base = {
-            "hello": "Hello! I am your LungVision AI Assistant.",
-            "book": "To book a doctor, complete the diagnosis, click 'Consult Specialist', and select a doctor.",
-            "fee": "The consultation booking fee is ₹500.",
-            "pay": "We accept major Credit Cards. The standard fee is ₹500.",
-            "report": "You can download your detailed PDF Analysis by clicking the 'Download PDF Report' button.",
-            "accuracy": "LungVision AI is trained on 7,000+ records and operates with ~98% predictive accuracy.",
-            "confidence": "The Confidence Score shows how certain the AI is based on your specific pattern.",
-            "risk": "We categorize risk into High, Medium, and Low based on 25 clinical parameters.",
-            "smoke": "Smoking is the top risk factor. We now analyze intensity and years of smoking.",
-            "blood": "Coughing of Blood (Hemoptysis) is a critical symptom. See a doctor immediately."
-        }
-        response = "I can help with Symptoms, Risks, or Booking. What would you like to know?"
-        for key in knowledge_base:
-            if key in user_msg:
-                response = knowledge_base[key]
-                break
+        user_msg = request.json.get('message', '')
+        response = chat_engine.answer(user_msg)
         return {"response": response}
     except Exception as e:
         return {"error": str(e)}, 500
 
+@app.route('/api/models/stats', methods=['GET'])
+def api_model_stats():
+    if router is None:
+        return {"error": "Model not loaded"}, 503
+    return jsonify(router.describe())
+
+def admin_denied():
+    if not ADMIN_TOKEN or profile_manager is None:
+        return {"error": "Profiling is disabled. Set LV_ADMIN_TOKEN to enable it."}, 404
+    if request.headers.get('X-Admin-Token') != ADMIN_TOKEN:
+        return {"error": "Forbidden"}, 403
+    return None
+
+@app.route('/api/admin/profile', methods=['GET', 'POST'])
+def api_admin_profile():
+    denied = admin_denied()
+    if denied: return denied
+    if request.method == 'GET':
+        return jsonify(profile_manager.status())
+    try:
+        body = request.json or {}
+        status = profile_manager.arm(body.get('requests', 1), body.get('mode'), body.get('path'))
+        return jsonify(status)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+
+@app.route('/api/admin/profile/background', methods=['POST'])
+def api_admin_profile_background():
+    denied = admin_denied()
+    if denied: return denied
+    hz = float((request.json or {}).get('hz', 0))
+    if hz > 0:
+        profile_manager.start_background(hz)
+    else:
+        profile_manager.stop_background()
+    return jsonify(profile_manager.status())
+
+@app.route('/api/admin/profile/background.speedscope.json', methods=['GET'])
+def api_admin_profile_background_dump():
+    denied = admin_denied()
+    if denied: return denied
+    if profile_manager.background is None:
+        return {"error": "Background sampling is off"}, 404
+    return jsonify(profile_manager.background.to_speedscope('background'))
+
+@app.route('/api/admin/profiles', methods=['GET'])
+def api_admin_profiles():
+    denied = admin_denied()
+    if denied: return denied
+    return jsonify(profile_manager.list_profiles())
+
+@app.route('/api/admin/profiles/<path:name>', methods=['GET'])
+def api_admin_profile_download(name):
+    denied = admin_denied()
+    if denied: return denied
+    return send_from_directory(PROFILE_DIR, name, as_attachment=True)
+
+@app.route('/api/live', methods=['GET'])
+def api_live():
+    # Liveness: the process is up and serving, nothing more
+    return jsonify({"status": "alive", "timestamp": datetime.now().isoformat()})
+
+@app.route('/api/ready', methods=['GET'])
+def api_ready():
+    # Readiness: route traffic here only once warm-up has finished
+    state = warmup.snapshot()
+    return jsonify(state), (200 if state['ready'] else 503)
+
 @app.route('/api/health', methods=['GET'])
 def api_health():
+    state = warmup.snapshot()
+    ready = state['ready']
     return jsonify({
-        "status": "ok", 
+        "status": "ok" if ready else ("failed" if state['failed'] else "warming_up"),
+        "ready": ready,
+        "failed": state['failed'],
         "model_loaded": model is not None,
         "timestamp": datetime.now().isoformat()
     })
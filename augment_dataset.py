@@ -1,6 +1,8 @@
 import pandas as pd
 import numpy as np
 
+from synthetic_data import generate_patients
+
 # ==========================================
 # 1. SETTINGS
 # ==========================================
@@ -25,57 +27,17 @@ if current_size >= TARGET_SIZE:
 # ==========================================
 print(f"Generating {TARGET_SIZE - current_size} new synthetic patients...")
 
-new_rows = []
 rows_to_generate = TARGET_SIZE - current_size
 
-# We loop through existing patients and create "variations" of them
-for i in range(rows_to_generate):
-    # Pick a random real patient to base this new one on
-    base_patient = df.sample(1).iloc[0].to_dict()
-    
-    # Create a new patient dict
-    new_patient = base_patient.copy()
-    
-    # --- ADD "SMART NOISE" (Variation) ---
-    
-    # 1. Vary Age (± 2 years, but keep between 10 and 80)
-    age_shift = np.random.randint(-2, 3)
-    new_patient['Age'] = max(10, min(80, base_patient['Age'] + age_shift))
-    
-    # 2. Vary Severity Inputs (± 1 point, keep between 1-8)
-    # This simulates different doctors giving slightly different ratings
-    symptom_cols = ['Air Pollution', 'Alcohol use', 'Dust Allergy', 'OccuPational Hazards', 
-                    'Genetic Risk', 'chronic Lung Disease', 'Balanced Diet', 'Obesity', 
-                    'Smoking', 'Passive Smoker', 'Chest Pain', 'Coughing of Blood', 
-                    'Fatigue', 'Weight Loss', 'Shortness of Breath', 'Wheezing', 
-                    'Swallowing Difficulty', 'Clubbing of Finger Nails', 'Frequent Cold', 
-                    'Dry Cough', 'Snoring']
-    
-    for col in symptom_cols:
-        if col in new_patient:
-            shift = np.random.randint(-1, 2) # -1, 0, or +1
-            new_val = base_patient[col] + shift
-            new_patient[col] = max(1, min(8, new_val)) # Clamp between 1 and 8
-            
-    # 3. Recalculate "Years of Smoking" (Using our Medical Logic)
-    # This ensures the new patient makes medical sense
-    max_possible = max(0, new_patient['Age'] - 13)
-    if new_patient['Level'] == 'High':
-        years = np.random.randint(10, 26)
-    elif new_patient['Level'] == 'Medium':
-        years = np.random.randint(5, 16)
-    else:
-        years = np.random.randint(0, 6)
-    new_patient['Years of Smoking'] = min(years, max_possible)
-    
-    # Add to list
-    new_rows.append(new_patient)
+# Each new patient is a random real patient plus "smart noise" (±2 years of age,
+# ±1 on every 1-8 score, smoking years re-derived from the risk level).
+# Vectorized in synthetic_data.generate_patients instead of one df.sample(1) per row.
+new_df = generate_patients(df, rows_to_generate, np.random.default_rng())
 
 # ==========================================
 # 4. SAVE THE MEGA DATASET
 # ==========================================
 # Combine old + new
-new_df = pd.DataFrame(new_rows)
 final_df = pd.concat([df, new_df], ignore_index=True)
 
 # Final Shuffle so old and new are mixed
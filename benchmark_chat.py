@@ -0,0 +1,60 @@
+import time
+import random
+import string
+
+from chat_engine import ChatEngine, normalize_message
+
+# ==========================================
+# CHAT ENGINE BENCHMARK
+# ==========================================
+# Grows a synthetic knowledge base and checks that uncached answer latency
+# stays flat (one regex pass per message regardless of KB size).
+
+KB_SIZES = [10, 100, 500, 2000]
+MESSAGES = 2000
+SEED = 42
+
+
+def random_word(rng, length):
+    return ''.join(rng.choice(string.ascii_lowercase) for _ in range(length))
+
+
+def build_entries(rng, size):
+    entries = []
+    for i in range(size):
+        keywords = [random_word(rng, rng.randint(4, 9)) for _ in range(rng.randint(1, 4))]
+        entries.append((keywords, f"Answer #{i}", rng.randint(0, 3)))
+    return entries
+
+
+def run():
+    rng = random.Random(SEED)
+    print(f"{'KB entries':>10} | {'uncached us/msg':>16} | {'cached us/msg':>14}")
+    print("-" * 48)
+    for size in KB_SIZES:
+        entries = build_entries(rng, size)
+        all_keywords = [kw for kws, _, _ in entries for kw in kws]
+        messages = []
+        for _ in range(MESSAGES):
+            words = [random_word(rng, rng.randint(3, 8)) for _ in range(8)]
+            words.insert(rng.randint(0, 8), rng.choice(all_keywords))
+            messages.append(' '.join(words))
+
+        engine = ChatEngine(entries, cache_size=MESSAGES)
+        start = time.perf_counter()
+        for msg in messages:
+            engine._answer(normalize_message(msg))
+        uncached = (time.perf_counter() - start) / MESSAGES * 1e6
+
+        for msg in messages:
+            engine.answer(msg)
+        start = time.perf_counter()
+        for msg in messages:
+            engine.answer(msg)
+        cached = (time.perf_counter() - start) / MESSAGES * 1e6
+
+        print(f"{size:>10} | {uncached:>16.2f} | {cached:>14.2f}")
+
+
+if __name__ == "__main__":
+    run()
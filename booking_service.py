@@ -0,0 +1,216 @@
+import io
+import os
+import csv
+import time
+import socket
+import hashlib
+import secrets
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+# ==========================================
+# BOOKING SERVICE
+# ==========================================
+# - Transaction IDs are time-ordered 64-bit ids (ms timestamp | worker id | sequence),
+#   so every worker can mint them on its own without colliding, as long as each
+#   worker has its own LV_WORKER_ID (0-1023).
+# - Client retries carrying the same idempotency key get the original booking back.
+# - A (Doctor Name, Appt Date, Appt Time) index rejects double-booked slots.
+
+HOSPITAL_COLUMNS = [
+    'Timestamp', 'Transaction ID', 'Payment Status', 'Patient Name', 'Diagnosis', 'Confidence',
+    'Doctor Name', 'Specialty', 'Appt Date', 'Appt Time', 'Fee Paid', 'Payment Method', 'Idempotency Key'
+]
+
+EPOCH_MS = 1735689600000  # 2025-01-01 UTC, keeps the ids short
+WORKER_BITS = 10
+SEQUENCE_BITS = 12
+MAX_WORKER_ID = (1 << WORKER_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+IDEMPOTENCY_CACHE_SIZE = 100000
+
+
+class SlotTakenError(Exception):
+    pass
+
+
+class InvalidBookingError(ValueError):
+    pass
+
+
+class TransactionIdGenerator:
+    """Snowflake-style ids: unique across workers, monotonic within one."""
+
+    def __init__(self, worker_id):
+        if not 0 <= worker_id <= MAX_WORKER_ID:
+            raise ValueError(f"worker_id must be between 0 and {MAX_WORKER_ID}")
+        self.worker_id = worker_id
+        self.lock = threading.Lock()  # Per-process only; workers never coordinate
+        self.last_ms = -1
+        self.sequence = 0
+
+    def next_id(self):
+        with self.lock:
+            now = int(time.time() * 1000) - EPOCH_MS
+            if now < self.last_ms:
+                # Clock went backwards: keep issuing from the last timestamp
+                now = self.last_ms
+            if now == self.last_ms:
+                self.sequence = (self.sequence + 1) & MAX_SEQUENCE
+                if self.sequence == 0:
+                    # 4096 ids used up this millisecond, wait for the next one
+                    while now <= self.last_ms:
+                        now = int(time.time() * 1000) - EPOCH_MS
+            else:
+                self.sequence = 0
+            self.last_ms = now
+            return (now << (WORKER_BITS + SEQUENCE_BITS)) | (self.worker_id << SEQUENCE_BITS) | self.sequence
+
+    def next_txn(self):
+        return f"TXN-{self.next_id()}"
+
+
+def default_worker_id():
+    """LV_WORKER_ID if set (set a distinct one per worker in multi-worker deployments).
+
+    Otherwise derived from hostname + PID: containers that all run as PID 1 still
+    differ by hostname, but a hash into 1024 ids can collide, so it is a fallback only.
+    """
+    env_id = os.environ.get('LV_WORKER_ID')
+    if env_id is not None:
+        try:
+            worker_id = int(env_id)
+        except ValueError:
+            raise ValueError(f"LV_WORKER_ID must be an integer, got '{env_id}'")
+        if not 0 <= worker_id <= MAX_WORKER_ID:
+            raise ValueError(f"LV_WORKER_ID must be between 0 and {MAX_WORKER_ID}, got {worker_id}")
+        print(f"Booking worker id {worker_id} (from LV_WORKER_ID).")
+        return worker_id
+
+    try:
+        seed = f"{socket.gethostname()}:{os.getpid()}"
+        source = f"hostname+pid {seed}"
+    except OSError:
+        seed = secrets.token_hex(16)
+        source = "random"
+    worker_id = int.from_bytes(hashlib.sha256(seed.encode()).digest()[:4], 'big') & MAX_WORKER_ID
+    print(f"⚠️ LV_WORKER_ID not set; booking worker id {worker_id} derived from {source}. "
+          f"Set a distinct LV_WORKER_ID per worker when running more than one.")
+    return worker_id
+
+
+def slot_key(doctor, date, appt_time):
+    return (str(doctor or '').strip(), str(date or '').strip(), str(appt_time or '').strip().upper())
+
+
+class BookingService:
+    def __init__(self, records_file, worker_id=None):
+        self.records_file = records_file
+        self.ids = TransactionIdGenerator(default_worker_id() if worker_id is None else worker_id)
+        self.lock = threading.Lock()
+        self.booked_slots = set()
+        self.pending_keys = set()  # Idempotency keys whose booking is still being written
+        self.idempotency = OrderedDict()  # key -> response dict (bounded LRU)
+        self.rebuild_index()
+
+    def _row_columns(self, header, row):
+        # Older rows were appended positionally under a different header,
+        # so pick the layout by field count
+        if len(row) == len(header):
+            return header
+        return HOSPITAL_COLUMNS[:len(row)]
+
+    def rebuild_index(self):
+        """Reads hospital_records.csv once so slots booked before a restart stay taken."""
+        slots = set()
+        idempotency = OrderedDict()
+        if os.path.exists(self.records_file):
+            with open(self.records_file, newline='', encoding='utf-8') as f:
+                reader = csv.reader(f)
+                header = next(reader, HOSPITAL_COLUMNS)
+                for values in reader:
+                    if not values:
+                        continue
+                    row = dict(zip(self._row_columns(header, values), values))
+                    slots.add(slot_key(row.get('Doctor Name'), row.get('Appt Date'), row.get('Appt Time')))
+                    key = row.get('Idempotency Key')
+                    if key:
+                        idempotency[key] = {"success": True, "transactionId": row.get('Transaction ID')}
+        with self.lock:
+            self.booked_slots = slots
+            self.idempotency = idempotency
+        print(f"Booking index built. {len(slots)} booked slots found.")
+
+    def _remember(self, key, response):
+        self.idempotency[key] = response
+        self.idempotency.move_to_end(key)
+        while len(self.idempotency) > IDEMPOTENCY_CACHE_SIZE:
+            self.idempotency.popitem(last=False)
+
+    def _append(self, record):
+        # Same positional layout /api/book has always appended (plus the idempotency key).
+        # The row goes out in a single O_APPEND write, so concurrent bookings can't interleave.
+        buf = io.StringIO()
+        writer = csv.DictWriter(buf, fieldnames=HOSPITAL_COLUMNS)
+        if not os.path.exists(self.records_file):
+            try:
+                with open(self.records_file, 'x', newline='', encoding='utf-8') as f:
+                    writer.writeheader()
+                    f.write(buf.getvalue())
+            except FileExistsError:
+                pass  # Another booking created it first
+            buf.seek(0)
+            buf.truncate()
+        writer.writerow(record)
+        with open(self.records_file, 'a', newline='', encoding='utf-8') as f:
+            f.write(buf.getvalue())
+
+    def book(self, data, idempotency_key=None):
+        slot = slot_key(data.get('doctorName'), data.get('date'), data.get('time'))
+        missing = [field for field, value in zip(('doctorName', 'date', 'time'), slot) if not value]
+        if missing:
+            raise InvalidBookingError(f"Missing booking field(s): {', '.join(missing)}")
+
+        # The lock only covers the in-memory reservation; the file append happens outside it
+        with self.lock:
+            if idempotency_key and idempotency_key in self.idempotency:
+                return self.idempotency[idempotency_key]
+            if idempotency_key and idempotency_key in self.pending_keys:
+                raise SlotTakenError("A booking with this idempotency key is still being processed")
+            if slot in self.booked_slots:
+                raise SlotTakenError(f"{slot[0]} is already booked on {slot[1]} at {slot[2]}")
+            self.booked_slots.add(slot)
+            if idempotency_key:
+                self.pending_keys.add(idempotency_key)
+            txn_id = self.ids.next_txn()
+
+        record = {
+            'Timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'Transaction ID': txn_id,
+            'Payment Status': 'Payment Successful',
+            'Patient Name': data.get('patientName'),
+            'Diagnosis': data.get('diagnosis'),
+            'Confidence': f"{data.get('confidence')}%",
+            'Doctor Name': data.get('doctorName'),
+            'Specialty': data.get('specialty'),
+            'Appt Date': data.get('date'),
+            'Appt Time': data.get('time'),
+            'Fee Paid': data.get('amount'),
+            'Payment Method': data.get('paymentMethod'),
+            'Idempotency Key': idempotency_key or '',
+        }
+        try:
+            self._append(record)
+        except Exception:
+            with self.lock:
+                self.booked_slots.discard(slot)
+                self.pending_keys.discard(idempotency_key)
+            raise
+
+        response = {"success": True, "transactionId": txn_id}
+        with self.lock:
+            if idempotency_key:
+                self.pending_keys.discard(idempotency_key)
+                self._remember(idempotency_key, response)
+        return response
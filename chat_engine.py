@@ -0,0 +1,115 @@
+import os
+import re
+import csv
+from functools import lru_cache
+
+# ==========================================
+# KNOWLEDGE-BASE CHAT ENGINE
+# ==========================================
+# All keywords are compiled ONCE into a single trie-shaped regex, so a message
+# is scanned in one pass no matter how many FAQ entries we have. Matches are
+# ranked (priority -> keyword hits -> earliest position) instead of taking
+# whichever key happened to come first in the dict.
+
+DEFAULT_RESPONSE = "I can help with Symptoms, Risks, or Booking. What would you like to know?"
+DEFAULT_CACHE_SIZE = 4096
+
+DEFAULT_KNOWLEDGE_BASE = [
+    (["hello"], "Hello! I am your LungVision AI Assistant.", 0),
+    (["book"], "To book a doctor, complete the diagnosis, click 'Consult Specialist', and select a doctor.", 1),
+    (["fee"], "The consultation booking fee is ₹500.", 1),
+    (["pay"], "We accept major Credit Cards. The standard fee is ₹500.", 1),
+    (["report"], "You can download your detailed PDF Analysis by clicking the 'Download PDF Report' button.", 1),
+    (["accuracy"], "LungVision AI is trained on 7,000+ records and operates with ~98% predictive accuracy.", 1),
+    (["confidence"], "The Confidence Score shows how certain the AI is based on your specific pattern.", 1),
+    (["risk"], "We categorize risk into High, Medium, and Low based on 25 clinical parameters.", 1),
+    (["smoke"], "Smoking is the top risk factor. We now analyze intensity and years of smoking.", 2),
+    (["blood"], "Coughing of Blood (Hemoptysis) is a critical symptom. See a doctor immediately.", 3),
+]
+
+_PUNCTUATION = re.compile(r"[^\w\s%₹]+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_message(message):
+    message = _PUNCTUATION.sub(" ", (message or "").lower())
+    return _WHITESPACE.sub(" ", message).strip()
+
+
+def _trie_to_regex(node):
+    """Turns a {char: subtrie} dict ('' marks a keyword end) into a regex body."""
+    branches = [re.escape(ch) + _trie_to_regex(child) for ch, child in sorted(node.items()) if ch]
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    if "" in node:
+        # Greedy optional group -> the longest keyword wins ("payment" over "pay")
+        body = "(?:" + body + ")?"
+    return body
+
+
+def compile_keywords(keywords):
+    trie = {}
+    for kw in keywords:
+        node = trie
+        for ch in kw:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+    # Keywords only need to start on a word boundary: "book" still matches "booking"
+    return re.compile(r"\b" + _trie_to_regex(trie))
+
+
+class ChatEngine:
+    def __init__(self, entries, default_response=DEFAULT_RESPONSE, cache_size=DEFAULT_CACHE_SIZE):
+        self.default_response = default_response
+        self.responses = []
+        self.priorities = []
+        self.keyword_index = {}  # keyword -> [entry ids]
+
+        for keywords, response, priority in entries:
+            entry_id = len(self.responses)
+            self.responses.append(response)
+            self.priorities.append(int(priority))
+            for kw in keywords:
+                kw = normalize_message(kw)
+                if kw:
+                    self.keyword_index.setdefault(kw, []).append(entry_id)
+
+        self.matcher = compile_keywords(self.keyword_index) if self.keyword_index else None
+        self._cached_answer = lru_cache(maxsize=cache_size)(self._answer)
+
+    @classmethod
+    def from_csv(cls, path, **kwargs):
+        if not os.path.exists(path):
+            print(f"Chat knowledge base not found at {path}. Using built-in answers.")
+            return cls(DEFAULT_KNOWLEDGE_BASE, **kwargs)
+        entries = []
+        with open(path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                keywords = [k for k in (row.get('keywords') or '').split('|') if k.strip()]
+                if keywords and row.get('response'):
+                    entries.append((keywords, row['response'], row.get('priority') or 0))
+        print(f"Chat knowledge base loaded. {len(entries)} entries found.")
+        return cls(entries, **kwargs)
+
+    def _answer(self, normalized):
+        if self.matcher is None:
+            return self.default_response
+
+        # entry id -> [hits, first position]
+        scores = {}
+        for match in self.matcher.finditer(normalized):
+            for entry_id in self.keyword_index[match.group(0)]:
+                score = scores.setdefault(entry_id, [0, match.start()])
+                score[0] += 1
+
+        if not scores:
+            return self.default_response
+        best = max(scores, key=lambda i: (self.priorities[i], scores[i][0], -scores[i][1]))
+        return self.responses[best]
+
+    def answer(self, message):
+        return self._cached_answer(normalize_message(message))
+
+    def cache_info(self):
+        return self._cached_answer.cache_info()
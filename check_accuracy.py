@@ -1,9 +1,9 @@
-import pandas as pd
 import pickle
 import os
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import LabelEncoder
 from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
+from feature_store import load_training_data, load_labels
 import matplotlib.pyplot as plt
 import seaborn as sns
 
@@ -18,10 +18,9 @@ if not os.path.exists(DATA_FILE):
     print("❌ Error: Dataset file not found.")
     exit()
 
-df = pd.read_csv(DATA_FILE)
-# ✅ Add errors='ignore' so it skips missing columns
-X = df.drop(['Level', 'index', 'Patient Id'], axis=1, errors='ignore')
-y = df['Level']
+# Canonical features + labels from the feature store (cached after the first run)
+X, _ = load_training_data(DATA_FILE)
+y = load_labels(DATA_FILE)
 
 # Encode targets (Low/Medium/High -> 0/1/2)
 le = LabelEncoder()
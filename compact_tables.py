@@ -0,0 +1,89 @@
+import pandas as pd
+
+# ==========================================
+# COMPACT TABLE LOADERS
+# ==========================================
+# Doctors and registry rows are mostly repeated strings and small integers.
+# Loading them as categoricals / float32 / UInt8 instead of generic object and
+# int64 columns cuts their in-memory size several times over.
+
+DOCTOR_COLUMNS = ["ID", "Name", "Specialty", "Hospital", "Location", "Rating", "ImageURL"]
+DOCTOR_DTYPES = {
+    "ID": "int32",
+    "Name": "object",
+    "Specialty": "category",
+    "Hospital": "category",
+    "Location": "category",
+    "Rating": "float32",
+    "ImageURL": "category",  # A few hundred doctors share a handful of photo URLs
+}
+
+REGISTRY_FEATURES = [
+    'Age', 'Gender', 'Air Pollution', 'Alcohol use', 'Dust Allergy', 'OccuPational Hazards',
+    'Genetic Risk', 'chronic Lung Disease', 'Balanced Diet', 'Obesity', 'Smoking',
+    'Passive Smoker', 'Chest Pain', 'Coughing of Blood', 'Fatigue', 'Weight Loss',
+    'Shortness of Breath', 'Wheezing', 'Swallowing Difficulty', 'Clubbing of Finger Nails',
+    'Frequent Cold', 'Dry Cough', 'Snoring'
+]
+REGISTRY_COLUMNS = ['Timestamp', 'Patient Name', 'Diagnosis', 'Confidence Score'] + REGISTRY_FEATURES + ['Name', 'GenderStr']
+# Nullable UInt8: the 1-8 scores (and Age) fit in a byte, and old rows may have blanks
+REGISTRY_DTYPES = {f: "UInt8" for f in REGISTRY_FEATURES}
+REGISTRY_DTYPES.update({'Diagnosis': 'category', 'GenderStr': 'category'})
+
+
+def load_doctors(path):
+    df = pd.read_csv(path, usecols=lambda c: c in DOCTOR_COLUMNS)
+    for col, dtype in DOCTOR_DTYPES.items():
+        if col not in df.columns:
+            df[col] = pd.Series(dtype=dtype)
+        elif dtype == "category":
+            df[col] = df[col].astype("category")
+        elif dtype != "object":
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype(dtype)
+    return df[DOCTOR_COLUMNS]
+
+
+def load_registry(path, usecols=None):
+    try:
+        return pd.read_csv(path, dtype=REGISTRY_DTYPES, usecols=usecols)
+    except (ValueError, TypeError) as e:
+        # A hand-edited row with a non-integer score: fall back to plain dtypes
+        print(f"Compact registry load failed ({e}), falling back to default dtypes")
+        return pd.read_csv(path, usecols=usecols)
+
+
+def to_json_records(df):
+    """NaN/NA -> None and numpy scalars -> Python types, ready for jsonify."""
+    return df.astype(object).where(df.notna(), None).to_dict(orient='records')
+
+
+class DoctorDirectory:
+    """Doctor table plus JSON-ready rows, built once instead of on every /api/doctors call."""
+
+    def __init__(self, df):
+        self.df = df
+        records = to_json_records(df)
+        for rec in records:
+            if rec.get('Rating') is not None:
+                rec['Rating'] = round(float(rec['Rating']), 2)  # float32 4.7 -> 4.7, not 4.699999809
+        self.records = records
+        self.by_specialty = {}
+        for i, specialty in enumerate(df['Specialty'].astype(object)):
+            self.by_specialty.setdefault(specialty, []).append(i)
+
+    @classmethod
+    def from_csv(cls, path):
+        return cls(load_doctors(path))
+
+    def __len__(self):
+        return len(self.records)
+
+    def find(self, specialties=None):
+        if not specialties:
+            return self.records
+        rows = sorted({i for s in specialties for i in self.by_specialty.get(s, [])})
+        return [self.records[i] for i in rows]
+
+
+def memory_bytes(df):
+    return int(df.memory_usage(deep=True).sum())
@@ -8,18 +8,14 @@ from sklearn.svm import SVC
 from sklearn.tree import DecisionTreeClassifier
 from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
 from catboost import CatBoostClassifier  # <--- THE NEW CHALLENGER
+from feature_store import load_training_data
 
 # ==========================================
 # 1. LOAD DATA
 # ==========================================
 print("Loading dataset...")
-df = pd.read_csv('cancer patient datasets.csv')
-
-# Prepare Data
-target_map = {'Low': 0, 'Medium': 1, 'High': 2}
-df['Level'] = df['Level'].map(target_map)
-X = df.drop(columns=['Level', 'Patient Id', 'index'], errors='ignore')
-y = df['Level']
+# Prepare Data (canonical features, Low/Medium/High -> 0/1/2)
+X, y = load_training_data('cancer patient datasets.csv')
 
 X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
@@ -0,0 +1,103 @@
+import os
+import json
+import shutil
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+# ==========================================
+# FEATURE STORE
+# ==========================================
+# One place that turns 'cancer patient datasets.csv' into the canonical
+# feature matrix + labels. The result is cached as memory-mapped .npy files
+# keyed by the source file's hash, so reruns skip CSV parsing and every
+# script trains on exactly the same columns in exactly the same order.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_FILE = os.path.join(BASE_DIR, 'cancer patient datasets.csv')
+CACHE_DIR = os.path.join(BASE_DIR, 'feature_cache')
+SCHEMA_VERSION = 1  # Bump when the drop list / encoding below changes
+
+TARGET_COLUMN = 'Level'
+TARGET_MAP = {'Low': 0, 'Medium': 1, 'High': 2}
+LEVELS = ['Low', 'Medium', 'High']  # Code -> label
+NON_FEATURE_COLUMNS = ['Level', 'Level_Num', 'index', 'Patient Id', 'Patient ID', 'id', 'Unnamed: 0']
+
+
+def file_hash(path, block_bytes=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_bytes), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_path(source_hash):
+    return os.path.join(CACHE_DIR, f"{source_hash[:16]}_v{SCHEMA_VERSION}")
+
+
+def materialize(path=DATA_FILE):
+    """Parses the CSV once and writes X.npy / y.npy / manifest.json into the cache."""
+    source_hash = file_hash(path)
+    out_dir = cache_path(source_hash)
+    df = pd.read_csv(path)
+
+    features = [c for c in df.columns if c not in NON_FEATURE_COLUMNS]
+    X = df[features].to_numpy(dtype=np.int32)
+    y = df[TARGET_COLUMN].map(TARGET_MAP).to_numpy(dtype=np.int8)
+
+    # Write into a temp dir and rename, so a crashed run never leaves a half cache behind
+    tmp_dir = f"{out_dir}.tmp{os.getpid()}"
+    os.makedirs(tmp_dir, exist_ok=True)
+    np.save(os.path.join(tmp_dir, 'X.npy'), X)
+    np.save(os.path.join(tmp_dir, 'y.npy'), y)
+    with open(os.path.join(tmp_dir, 'manifest.json'), 'w') as f:
+        json.dump({
+            'schema_version': SCHEMA_VERSION,
+            'source': os.path.basename(path),
+            'source_hash': source_hash,
+            'rows': int(len(X)),
+            'features': features,
+            'levels': LEVELS,
+        }, f, indent=2)
+    try:
+        os.replace(tmp_dir, out_dir)
+    except OSError:
+        # Another process won the race; its cache is identical
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    print(f"Feature store materialized {len(X)} rows -> {out_dir}")
+    return out_dir
+
+
+def load_matrices(path=DATA_FILE):
+    """Returns (X memmap, y memmap, manifest), building the cache on first use."""
+    out_dir = cache_path(file_hash(path))
+    if not os.path.exists(os.path.join(out_dir, 'manifest.json')):
+        out_dir = materialize(path)
+    with open(os.path.join(out_dir, 'manifest.json')) as f:
+        manifest = json.load(f)
+    X = np.load(os.path.join(out_dir, 'X.npy'), mmap_mode='r')
+    y = np.load(os.path.join(out_dir, 'y.npy'), mmap_mode='r')
+    return X, y, manifest
+
+
+def load_training_data(path=DATA_FILE):
+    """(X DataFrame, y Series of 0/1/2 codes) in canonical column order."""
+    X, y, manifest = load_matrices(path)
+    return pd.DataFrame(X, columns=manifest['features']), pd.Series(y, name='Level_Num')
+
+
+def load_labels(path=DATA_FILE):
+    """Same rows as load_training_data, but as 'Low'/'Medium'/'High' strings."""
+    _, y, _ = load_matrices(path)
+    return pd.Series(np.array(LEVELS)[y], name=TARGET_COLUMN)
+
+
+def feature_columns(path=DATA_FILE):
+    return load_matrices(path)[2]['features']
+
+
+def build_input_frame(input_data, features):
+    """One-row frame for inference, in exactly the column order the model was trained on."""
+    return pd.DataFrame([[input_data[f] for f in features]], columns=features)
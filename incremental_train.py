@@ -0,0 +1,255 @@
+import os
+import json
+import time
+import pickle
+import shutil
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import shap
+from catboost import CatBoostClassifier
+from sklearn.model_selection import train_test_split
+from sklearn.metrics import accuracy_score
+
+from feature_store import load_training_data, LEVELS
+from registry_store import ParquetRegistry
+from export_stream import read_csv_from
+
+# ==========================================
+# ⚠️ LABELS ARE THE MODEL'S OWN PREDICTIONS
+# ==========================================
+# The registry's 'Diagnosis' column is written by /api/predict from the served
+# model's output, NOT by a clinician. Training on it is self-training: the model
+# learns to agree with itself, and errors reinforce. The holdout below comes from
+# the original CSV, so it will NOT catch that drift.
+#   - If the registry has a clinician-confirmed column (CONFIRMED_LABEL_COLUMN),
+#     only rows with that label are used and Diagnosis is ignored.
+#   - Otherwise only high-confidence predictions are used (MIN_LABEL_CONFIDENCE),
+#     which limits, but does not remove, the feedback loop.
+# ==========================================
+# ⚙️ CONFIGURATION
+# ==========================================
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_FILE = os.path.join(BASE_DIR, 'lung_cancer_model.pkl')
+BACKUP_FILE = os.path.join(BASE_DIR, 'lung_cancer_model.prev.pkl')
+DATA_FILE = os.path.join(BASE_DIR, 'cancer patient datasets.csv')
+PATIENT_REGISTRY = os.path.join(BASE_DIR, 'patient_registry.csv')
+CHECKPOINT_FILE = os.path.join(BASE_DIR, 'training_checkpoint.json')
+REGISTRY_STORE_DIR = os.path.join(BASE_DIR, 'registry_store')
+REGISTRY_BACKEND = os.environ.get('LV_REGISTRY_BACKEND', 'csv')  # Same switch as app.py
+
+MIN_NEW_ROWS = 20             # Not worth a training round below this
+CONFIRMED_LABEL_COLUMN = 'Confirmed Diagnosis'  # Clinician-confirmed label, preferred when present
+MIN_LABEL_CONFIDENCE = 90.0   # Without confirmed labels, predictions below this Confidence Score (%) are skipped
+REPLAY_ROWS = 1000            # Original rows mixed in so the model doesn't forget them
+EXTRA_ITERATIONS = 100        # Trees added on top of the previous model
+LEARNING_RATE = 0.03
+
+MAX_ACCURACY_DROP = 0.5       # Percentage points allowed below the current model on the holdout
+MIN_ACCURACY = 90.0           # Absolute floor (%)
+LATENCY_BUDGET_MS = 25.0      # Single-row predict_proba, median
+MAX_LATENCY_GROWTH = 1.25     # New model may be at most 25% slower than the current one...
+LATENCY_TOLERANCE_MS = 0.5    # ...plus this much, since ~1-2 ms medians are noisy
+LATENCY_RUNS = 500            # Timed runs per model (interleaved)
+
+
+# ==========================================
+# 1. CHECKPOINT
+# ==========================================
+def load_checkpoint():
+    if os.path.exists(CHECKPOINT_FILE):
+        with open(CHECKPOINT_FILE) as f:
+            return json.load(f)
+    return {'registry_rows': 0, 'registry_after': None, 'registry_after_seen': {}, 'version': 0, 'history': []}
+
+
+def save_checkpoint(checkpoint):
+    tmp = f"{CHECKPOINT_FILE}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(tmp, CHECKPOINT_FILE)
+
+
+# ==========================================
+# 2. INGEST ONLY THE NEW REGISTRY ROWS
+# ==========================================
+def row_fingerprints(df):
+    return pd.util.hash_pandas_object(df.astype(str), index=False).astype(str)
+
+
+def read_new_registry_rows(checkpoint, features):
+    """Returns (rows, checkpoint updates). CSV resumes by row count, Parquet by Timestamp.
+
+    Timestamps only have one-second resolution, so the Parquet cursor is inclusive
+    (>= registry_after) and remembers which rows at exactly that second were
+    already consumed (registry_after_seen: fingerprint -> count).
+    """
+    if REGISTRY_BACKEND == 'parquet':
+        after = checkpoint.get('registry_after')
+        columns = ['Timestamp', 'Patient Name', 'Diagnosis', 'Confidence Score'] + [f for f in features if f != 'Years of Smoking']
+        # Only the needed columns, and only partitions/rows from the checkpoint on
+        df = ParquetRegistry(REGISTRY_STORE_DIR).read(columns=columns, start=after)
+        df['Diagnosis'] = df['Diagnosis'].astype(str)
+        fingerprints = row_fingerprints(df)
+        if after is not None:
+            seen = dict(checkpoint.get('registry_after_seen', {}))
+            at_cursor = df['Timestamp'] == pd.Timestamp(after)
+            # Drop as many copies of each fingerprint at the cursor second as were already used
+            occurrence = fingerprints[at_cursor].groupby(fingerprints[at_cursor]).cumcount()
+            already = pd.Series(False, index=df.index)
+            already[at_cursor] = occurrence < fingerprints[at_cursor].map(lambda fp: seen.get(fp, 0))
+            df, fingerprints = df[~already], fingerprints[~already]
+        if not len(df):
+            return df, {}
+        latest = df['Timestamp'].max()
+        cursor = {'registry_after': latest.strftime("%Y-%m-%d %H:%M:%S")}
+        at_latest = fingerprints[df['Timestamp'] == latest].value_counts().to_dict()
+        if after is not None and latest == pd.Timestamp(after):
+            for fp, count in checkpoint.get('registry_after_seen', {}).items():
+                at_latest[fp] = at_latest.get(fp, 0) + count
+        cursor['registry_after_seen'] = {fp: int(n) for fp, n in at_latest.items()}
+        return df, cursor
+
+    if not os.path.exists(PATIENT_REGISTRY):
+        return None, {}
+    offset = checkpoint.get('registry_rows', 0)
+    df = read_csv_from(PATIENT_REGISTRY, offset)
+    return df, {'registry_rows': offset + len(df)}
+
+
+def load_new_rows(checkpoint, features, fill_values):
+    df, cursor = read_new_registry_rows(checkpoint, features)
+    if df is None:
+        return None, None, cursor
+
+    if CONFIRMED_LABEL_COLUMN in df.columns and df[CONFIRMED_LABEL_COLUMN].isin(LEVELS).any():
+        df = df[df[CONFIRMED_LABEL_COLUMN].isin(LEVELS)].copy()
+        df['Diagnosis'] = df[CONFIRMED_LABEL_COLUMN]
+        print(f"      Using clinician-confirmed labels ('{CONFIRMED_LABEL_COLUMN}').")
+    else:
+        print("      ⚠️ No confirmed labels: training on the model's own predictions (see module header).")
+        df = df[df['Diagnosis'].isin(LEVELS)]
+        if MIN_LABEL_CONFIDENCE > 0 and 'Confidence Score' in df.columns:
+            conf = pd.to_numeric(df['Confidence Score'].astype(str).str.rstrip('%'), errors='coerce')
+            df = df[conf >= MIN_LABEL_CONFIDENCE]
+
+    # The registry doesn't store every model feature (e.g. Years of Smoking)
+    for f in features:
+        if f not in df.columns:
+            df[f] = fill_values[f]
+    X = df[features].apply(pd.to_numeric, errors='coerce').fillna(fill_values).astype(np.int32)
+    return X, df['Diagnosis'].astype(str), cursor
+
+
+# ==========================================
+# 3. EVALUATION GATES
+# ==========================================
+def median_latencies_ms(models, row, runs=LATENCY_RUNS):
+    """Median single-row latency per model, interleaved so machine noise hits all of them alike."""
+    for model in models:
+        model.predict_proba(row)  # Warm
+    times = [[] for _ in models]
+    for _ in range(runs):
+        for i, model in enumerate(models):
+            start = time.perf_counter()
+            model.predict_proba(row)
+            times[i].append((time.perf_counter() - start) * 1000)
+    return [float(np.median(t)) for t in times]
+
+
+def accuracy(model, X_holdout, y_holdout):
+    return accuracy_score(y_holdout, np.asarray(model.predict(X_holdout)).ravel()) * 100
+
+
+def run():
+    started = time.perf_counter()
+    print("\n🔄 [1/5] Loading current model + checkpoint...")
+    with open(MODEL_FILE, 'rb') as f:
+        artifacts = pickle.load(f)
+    old_model = artifacts['model']
+    features = artifacts['features']
+    le = artifacts['le']
+    checkpoint = load_checkpoint()
+
+    # Fixed holdout: same split every script uses (test_size=0.2, random_state=42)
+    X_all, y_all = load_training_data(DATA_FILE)
+    X_all = X_all[features]
+    y_all = le.transform(np.array(LEVELS)[y_all])
+    X_train, X_holdout, y_train, y_holdout = train_test_split(X_all, y_all, test_size=0.2, random_state=42)
+    fill_values = X_train.median().round().astype(int).to_dict()
+
+    print(f"   -> [2/5] Reading new registry rows ({REGISTRY_BACKEND} backend)...")
+    X_new, labels_new, cursor = load_new_rows(checkpoint, features, fill_values)
+    if X_new is None or len(X_new) < MIN_NEW_ROWS:
+        print(f"   -> Only {0 if X_new is None else len(X_new)} usable new rows (need {MIN_NEW_ROWS}). Nothing to do.")
+        return
+    y_new = le.transform(labels_new)
+    print(f"      {len(X_new)} new labeled rows.")
+
+    # Replay a slice of the original training data alongside the new cases
+    replay_idx = np.random.default_rng(checkpoint['version']).choice(len(X_train), min(REPLAY_ROWS, len(X_train)), replace=False)
+    X_fit = pd.concat([X_new, X_train.iloc[replay_idx]], ignore_index=True)
+    y_fit = np.concatenate([y_new, y_train[replay_idx]])
+
+    print(f"\n🧠 [3/5] Warm-starting CatBoost (+{EXTRA_ITERATIONS} trees)...")
+    params = old_model.get_params()
+    params.update({'iterations': EXTRA_ITERATIONS, 'learning_rate': LEARNING_RATE, 'verbose': 0})
+    new_model = CatBoostClassifier(**params)
+    new_model.fit(X_fit, y_fit, init_model=old_model)
+
+    print("\n📝 [4/5] Validating on the fixed holdout...")
+    old_acc, new_acc = accuracy(old_model, X_holdout, y_holdout), accuracy(new_model, X_holdout, y_holdout)
+    old_ms, new_ms = median_latencies_ms([old_model, new_model], X_holdout.iloc[:1])
+    print(f"      Current: {old_acc:.2f}% @ {old_ms:.2f} ms | Candidate: {new_acc:.2f}% @ {new_ms:.2f} ms")
+
+    failures = []
+    if new_acc < old_acc - MAX_ACCURACY_DROP:
+        failures.append(f"accuracy dropped {old_acc - new_acc:.2f} pts")
+    if new_acc < MIN_ACCURACY:
+        failures.append(f"accuracy below {MIN_ACCURACY}%")
+    if new_ms > LATENCY_BUDGET_MS:
+        failures.append(f"latency {new_ms:.2f} ms over the {LATENCY_BUDGET_MS} ms budget")
+    if new_ms > old_ms * MAX_LATENCY_GROWTH + LATENCY_TOLERANCE_MS:
+        failures.append(f"latency grew {new_ms / old_ms:.2f}x")
+
+    entry = {
+        'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'new_rows': int(len(X_new)),
+        'accuracy': round(new_acc, 3),
+        'latency_ms': round(new_ms, 3),
+        'seconds': round(time.perf_counter() - started, 1),
+    }
+    if failures:
+        # Checkpoint is NOT advanced, so these rows are retried with the next batch
+        entry['published'] = False
+        entry['reason'] = '; '.join(failures)
+        checkpoint['history'].append(entry)
+        save_checkpoint(checkpoint)
+        print(f"❌ Candidate rejected: {entry['reason']}")
+        return
+
+    print("\n🚀 [5/5] Publishing new model...")
+    bundle = {
+        'model': new_model,
+        'explainer': shap.TreeExplainer(new_model),
+        'features': features,
+        'le': le,
+    }
+    tmp = f"{MODEL_FILE}.tmp"
+    with open(tmp, 'wb') as f:
+        pickle.dump(bundle, f)
+    shutil.copyfile(MODEL_FILE, BACKUP_FILE)
+    os.replace(tmp, MODEL_FILE)
+
+    checkpoint.update(cursor)
+    checkpoint['version'] += 1
+    entry['published'] = True
+    entry['version'] = checkpoint['version']
+    checkpoint['history'].append(entry)
+    save_checkpoint(checkpoint)
+    print(f"✅ Model v{checkpoint['version']} published in {entry['seconds']}s (previous kept at {os.path.basename(BACKUP_FILE)})")
+
+
+if __name__ == "__main__":
+    run()
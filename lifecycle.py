@@ -0,0 +1,86 @@
+import time
+import threading
+import traceback
+
+# ==========================================
+# STARTUP LIFECYCLE / WARM-UP TRACKING
+# ==========================================
+# The server binds its port straight away; models load and warm up on a
+# background thread. Each step is recorded here so /api/ready can tell a
+# load balancer when the first real request will be as fast as steady state.
+
+PENDING, RUNNING, DONE, FAILED = 'pending', 'running', 'done', 'failed'
+
+
+class WarmupTracker:
+    def __init__(self, stages):
+        self.lock = threading.Condition()  # Also wakes up requests blocked in wait_for()
+        self.started_at = time.time()
+        self.finished_at = None
+        self.stages = {name: {'status': PENDING, 'ms': None, 'error': None} for name in stages}
+        self.thread = None
+
+    def run_stage(self, name, fn, required=True):
+        """Runs one warm-up step. A failed required step leaves the worker not ready."""
+        with self.lock:
+            self.stages[name]['status'] = RUNNING
+        start = time.perf_counter()
+        try:
+            fn()
+            status, error = DONE, None
+        except Exception as e:
+            traceback.print_exc()
+            status, error = FAILED, str(e)
+        with self.lock:
+            self.stages[name].update({
+                'status': status,
+                'ms': round((time.perf_counter() - start) * 1000, 1),
+                'error': error,
+                'required': required,
+            })
+            self.lock.notify_all()
+        return status == DONE or not required
+
+    def start(self, steps):
+        """steps: list of (stage name, fn, required). Stops at the first failed required step."""
+        def _run():
+            for name, fn, required in steps:
+                if not self.run_stage(name, fn, required):
+                    break
+            with self.lock:
+                self.finished_at = time.time()
+
+        self.thread = threading.Thread(target=_run, name='warmup', daemon=True)
+        self.thread.start()
+
+    def wait_for(self, name, timeout):
+        """Blocks until stage `name` has finished (done or failed) or timeout seconds pass.
+
+        Returns the stage status, so callers can tell 'still warming up' from 'failed'.
+        """
+        with self.lock:
+            self.lock.wait_for(lambda: self.stages[name]['status'] in (DONE, FAILED), timeout)
+            return self.stages[name]['status']
+
+    @property
+    def ready(self):
+        with self.lock:
+            return all(
+                s['status'] == DONE or (s['status'] == FAILED and not s.get('required', True))
+                for s in self.stages.values()
+            )
+
+    def snapshot(self):
+        with self.lock:
+            done = sum(1 for s in self.stages.values() if s['status'] in (DONE, FAILED))
+            failed = any(s['status'] == FAILED and s.get('required', True) for s in self.stages.values())
+            stages = {name: dict(s) for name, s in self.stages.items()}
+            finished_at = self.finished_at
+        return {
+            'ready': self.ready,
+            'failed': failed,
+            'progress': round(done / len(stages), 3) if stages else 1.0,
+            'stages': stages,
+            'uptime_s': round(time.time() - self.started_at, 1),
+            'warmup_s': round(finished_at - self.started_at, 1) if finished_at else None,
+        }
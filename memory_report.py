@@ -0,0 +1,43 @@
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from compact_tables import load_doctors, load_registry, memory_bytes
+
+# ==========================================
+# TABLE MEMORY REPORT
+# ==========================================
+# Blows the doctors / registry CSVs up to N rows (resampling real rows),
+# then compares plain pd.read_csv against the compact loaders.
+
+SIZES = [10_000, 100_000, 1_000_000]
+SEED = 42
+DB_FILE = 'doctors_database.csv'
+REGISTRY_FILE = 'patient_registry.csv'
+
+
+def mb(n_bytes):
+    return f"{n_bytes / 1024 / 1024:>9.2f} MB"
+
+
+def report(name, source, compact_loader, rng):
+    base = pd.read_csv(source)
+    print(f"\n📊 {name} ({source}, {len(base)} real rows)")
+    print(f"{'rows':>10} | {'pd.read_csv':>12} | {'compact':>12} | {'saving':>7}")
+    print("-" * 52)
+    for size in SIZES:
+        sample = base.iloc[rng.integers(0, len(base), size)]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'table.csv')
+            sample.to_csv(path, index=False)
+            before = memory_bytes(pd.read_csv(path))
+            after = memory_bytes(compact_loader(path))
+        print(f"{size:>10,} | {mb(before)} | {mb(after)} | {before / after:>6.1f}x")
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(SEED)
+    report("Doctors", DB_FILE, load_doctors, rng)
+    report("Patient Registry", REGISTRY_FILE, load_registry, rng)
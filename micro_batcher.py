@@ -0,0 +1,120 @@
+import time
+import queue
+import threading
+from collections import Counter, deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+import numpy as np
+
+# ==========================================
+# REQUEST-COALESCING MICRO-BATCHER
+# ==========================================
+# Concurrent requests are parked on a queue. A single worker thread takes the
+# first one, keeps collecting until the window closes (max_wait_ms) or the
+# batch is full (max_batch), runs ONE batch call and hands each caller its row.
+# A request therefore waits at most max_wait_ms before its batch starts.
+
+LATENCY_WINDOW = 1000
+
+
+class BatchTimeoutError(Exception):
+    pass
+
+
+class MicroBatcher:
+    def __init__(self, batch_fn, max_batch=64, max_wait_ms=2.0, timeout_s=10.0, name='batcher'):
+        """batch_fn(list_of_items) must return one result per item, in the same order."""
+        self.batch_fn = batch_fn
+        self.max_batch = max(1, int(max_batch))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000
+        self.timeout_s = timeout_s
+        self.queue = queue.Queue()
+
+        self.lock = threading.Lock()
+        self.batch_sizes = Counter()
+        self.queue_waits = deque(maxlen=LATENCY_WINDOW)
+        self.batch_latencies = deque(maxlen=LATENCY_WINDOW)
+        self.batches = 0
+        self.failures = 0
+        self.cancelled = 0  # Timed out while still queued, so never run
+
+        self.worker = threading.Thread(target=self._run, name=name, daemon=True)
+        self.worker.start()
+
+    def submit(self, item):
+        future = Future()
+        self.queue.put((item, future, time.perf_counter()))
+        try:
+            return future.result(timeout=self.timeout_s)
+        except FutureTimeoutError:
+            # Still queued: the worker drops it instead of running inference nobody will read.
+            # Already running: cancel() is a no-op and the result is discarded.
+            future.cancel()
+            raise BatchTimeoutError(f"Batched inference did not finish within {self.timeout_s}s")
+
+    def _collect(self):
+        batch = [self.queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            live = [entry for entry in batch if entry[1].set_running_or_notify_cancel()]
+            if len(live) < len(batch):
+                with self.lock:
+                    self.cancelled += len(batch) - len(live)
+            batch = live
+            if not batch:
+                continue
+            started = time.perf_counter()
+            items = [item for item, _, _ in batch]
+            futures = [future for _, future, _ in batch]
+            try:
+                results = self.batch_fn(items)
+                if len(results) != len(items):
+                    raise RuntimeError(f"batch_fn returned {len(results)} results for {len(items)} items")
+                for future, result in zip(futures, results):
+                    future.set_result(result)
+            except Exception as e:
+                with self.lock:
+                    self.failures += 1
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+
+            finished = time.perf_counter()
+            with self.lock:
+                self.batches += 1
+                self.batch_sizes[len(batch)] += 1
+                self.batch_latencies.append((finished - started) * 1000)
+                self.queue_waits.extend((started - queued) * 1000 for _, _, queued in batch)
+
+    def stats(self):
+        with self.lock:
+            waits = np.array(self.queue_waits) if self.queue_waits else np.zeros(1)
+            runs = np.array(self.batch_latencies) if self.batch_latencies else np.zeros(1)
+            requests = sum(size * count for size, count in self.batch_sizes.items())
+            return {
+                'max_batch': self.max_batch,
+                'max_wait_ms': self.max_wait * 1000,
+                'batches': self.batches,
+                'requests': requests,
+                'failures': self.failures,
+                'cancelled': self.cancelled,
+                'mean_batch_size': round(requests / self.batches, 3) if self.batches else None,
+                'batch_size_histogram': {str(k): v for k, v in sorted(self.batch_sizes.items())},
+                'queue_wait_p50_ms': round(float(np.percentile(waits, 50)), 3),
+                'queue_wait_p99_ms': round(float(np.percentile(waits, 99)), 3),
+                'batch_run_p50_ms': round(float(np.percentile(runs, 50)), 3),
+                'batch_run_p99_ms': round(float(np.percentile(runs, 99)), 3),
+                'queue_depth': self.queue.qsize(),
+            }
@@ -0,0 +1,202 @@
+import time
+import random
+import pickle
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# ==========================================
+# MODEL ROUTER (A/B + SHADOW INFERENCE)
+# ==========================================
+# The primary model always owns the SHAP explainer and the dashboard.
+# A candidate model can either serve a share of live traffic ("ab") or run
+# in the background on every request ("shadow") so its latency never lands
+# on the user's critical path.
+
+ROUTING_MODES = ('off', 'ab', 'shadow')
+TARGET_LABELS = {0: 'Low', 1: 'Medium', 2: 'High'}  # Same target_map as the training scripts
+LATENCY_WINDOW = 1000  # Keep the last N latencies per model for percentiles
+MAX_SHADOW_IN_FLIGHT = 32  # Queued + running shadow runs; beyond this they are dropped
+
+
+class ServedModel:
+    """One loaded artifact plus the bits needed to turn its output into a label."""
+
+    def __init__(self, name, model, features, le=None, batcher=None):
+        self.name = name
+        self.model = model
+        self.features = list(features)
+        self.le = le
+        self.batcher = batcher  # Optional MicroBatcher returning (label, probs, explanation)
+
+    def decode(self, code):
+        if isinstance(code, (list, np.ndarray)):
+            code = code[0]
+        if self.le is not None:
+            return self.le.inverse_transform([int(code)])[0]
+        if isinstance(code, str):
+            return code
+        return TARGET_LABELS.get(int(code), str(code))
+
+    def predict(self, input_data):
+        """Returns (label, probs, explanation); explanation is only filled in by a batcher."""
+        if self.batcher is not None:
+            return self.batcher.submit(input_data)
+        input_df = pd.DataFrame([[input_data.get(f, 1) for f in self.features]], columns=self.features)
+        pred_code = self.model.predict(input_df)[0]
+        probs = self.model.predict_proba(input_df)[0]
+        return self.decode(pred_code), probs, None
+
+
+def load_served_model(name, path):
+    """Loads either a dict bundle ({'model', 'features', 'le'}) or a bare sklearn estimator."""
+    try:
+        import joblib
+    except ImportError:
+        joblib = None
+    # Only a missing joblib falls back to pickle; errors while unpickling must surface as-is
+    if joblib is not None:
+        artifacts = joblib.load(path)
+    else:
+        with open(path, 'rb') as f:
+            artifacts = pickle.load(f)
+
+    if isinstance(artifacts, dict):
+        model = artifacts.get('model')
+        features = artifacts.get('features') or list(getattr(model, 'feature_names_in_', []))
+        le = artifacts.get('le')
+    else:
+        model = artifacts
+        features = list(getattr(model, 'feature_names_in_', []))
+        le = None
+
+    if model is None or not features:
+        raise ValueError(f"{path} has no usable model/feature list")
+    return ServedModel(name, model, features, le)
+
+
+class ModelStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.served = {}
+        self.errors = {}
+        self.shadow_runs = 0
+        self.shadow_dropped = 0
+        self.agreements = 0
+
+    def record(self, name, seconds, served=False):
+        with self.lock:
+            self.latencies.setdefault(name, deque(maxlen=LATENCY_WINDOW)).append(seconds * 1000)
+            if served:
+                self.served[name] = self.served.get(name, 0) + 1
+
+    def record_error(self, name):
+        with self.lock:
+            self.errors[name] = self.errors.get(name, 0) + 1
+
+    def record_shadow_dropped(self):
+        with self.lock:
+            self.shadow_dropped += 1
+
+    def record_agreement(self, agreed):
+        with self.lock:
+            self.shadow_runs += 1
+            if agreed:
+                self.agreements += 1
+
+    def snapshot(self):
+        with self.lock:
+            models = {}
+            for name, window in self.latencies.items():
+                values = np.array(window)
+                models[name] = {
+                    'served': self.served.get(name, 0),
+                    'errors': self.errors.get(name, 0),
+                    'samples': len(values),
+                    'p50_ms': round(float(np.percentile(values, 50)), 3),
+                    'p95_ms': round(float(np.percentile(values, 95)), 3),
+                    'mean_ms': round(float(values.mean()), 3),
+                }
+            return {
+                'models': models,
+                'shadow_runs': self.shadow_runs,
+                'shadow_dropped': self.shadow_dropped,
+                'agreement_rate': round(self.agreements / self.shadow_runs, 4) if self.shadow_runs else None,
+            }
+
+
+class ModelRouter:
+    def __init__(self, primary, candidate=None, mode='off', ab_share=0.0, shadow_workers=2,
+                 max_shadow_in_flight=MAX_SHADOW_IN_FLIGHT):
+        if mode not in ROUTING_MODES:
+            raise ValueError(f"Unknown routing mode '{mode}'. Use one of {ROUTING_MODES}")
+        self.primary = primary
+        self.candidate = candidate
+        self.mode = mode if candidate is not None else 'off'
+        self.ab_share = max(0.0, min(1.0, float(ab_share)))
+        self.stats = ModelStats()
+        self.executor = ThreadPoolExecutor(max_workers=shadow_workers, thread_name_prefix='shadow')
+        # The executor's queue is unbounded; this caps the backlog when the candidate is slower than traffic
+        self.shadow_slots = threading.BoundedSemaphore(max_shadow_in_flight)
+
+    def _timed_predict(self, served_model, input_data):
+        start = time.perf_counter()
+        result, probs, explanation = served_model.predict(input_data)
+        return result, probs, explanation, time.perf_counter() - start
+
+    def _run_shadow(self, input_data, primary_result):
+        try:
+            result, _, _, elapsed = self._timed_predict(self.candidate, input_data)
+            self.stats.record(self.candidate.name, elapsed)
+            self.stats.record_agreement(result == primary_result)
+        except Exception as e:
+            self.stats.record_error(self.candidate.name)
+            print(f"Shadow model '{self.candidate.name}' failed: {e}")
+        finally:
+            self.shadow_slots.release()
+
+    def schedule_shadow(self, input_data, primary_result):
+        """Queues a candidate run for comparison; call it once the response has been sent."""
+        if self.mode != 'shadow':
+            return
+        if not self.shadow_slots.acquire(blocking=False):
+            self.stats.record_shadow_dropped()
+            return
+        try:
+            self.executor.submit(self._run_shadow, dict(input_data), primary_result)
+        except RuntimeError:
+            # Executor shut down (interpreter exit)
+            self.shadow_slots.release()
+
+    def predict(self, input_data):
+        """Returns (served_model_name, label, probs, explanation). Shadow work is the caller's
+        to queue via schedule_shadow(), after the response is out."""
+        if self.mode == 'ab' and random.random() < self.ab_share:
+            try:
+                result, probs, explanation, elapsed = self._timed_predict(self.candidate, input_data)
+                self.stats.record(self.candidate.name, elapsed, served=True)
+                return self.candidate.name, result, probs, explanation
+            except Exception as e:
+                # Never fail a user request because of the candidate
+                self.stats.record_error(self.candidate.name)
+                print(f"Candidate model '{self.candidate.name}' failed, falling back: {e}")
+
+        result, probs, explanation, elapsed = self._timed_predict(self.primary, input_data)
+        self.stats.record(self.primary.name, elapsed, served=True)
+        return self.primary.name, result, probs, explanation
+
+    def describe(self):
+        info = self.stats.snapshot()
+        info.update({
+            'mode': self.mode,
+            'ab_share': self.ab_share,
+            'primary': self.primary.name,
+            'candidate': self.candidate.name if self.candidate else None,
+        })
+        if self.primary.batcher is not None:
+            info['batching'] = self.primary.batcher.stats()
+        return info
@@ -0,0 +1,264 @@
+import os
+import sys
+import json
+import time
+import cProfile
+import threading
+from collections import Counter
+from datetime import datetime
+
+# ==========================================
+# PROFILING HOOKS
+# ==========================================
+# Opt-in only. Two ways to look inside a live worker:
+#   1. Capture the next N requests (or any request with an X-Profile header)
+#      as a cProfile .pstats file or a speedscope JSON from the stack sampler.
+#   2. A low-rate background sampler that keeps aggregating stacks across ALL
+#      threads, so time spent in the micro-batcher (catboost / shap) and the
+#      plot code is attributed even though it isn't on the request thread.
+
+PROFILE_MODES = ('cprofile', 'sampling')
+MAX_PROFILES = 50
+MAX_STACKS = 20000
+REQUEST_SAMPLE_INTERVAL_S = 0.001
+
+# Stacks whose leaf sits in one of these are threads waiting for work, not doing it
+IDLE_FILES = ('threading.py', 'queue.py', 'selectors.py', 'socketserver.py', 'socket.py')
+LIBRARIES = ('catboost', 'shap', 'matplotlib', 'pandas', 'numpy', 'sklearn', 'flask', 'werkzeug')
+
+
+def _frame_key(frame):
+    code = frame.f_code
+    return (code.co_name, code.co_filename, code.co_firstlineno)
+
+
+def _category(filename, app_file=None):
+    if app_file and os.path.abspath(filename) == app_file:
+        return os.path.basename(app_file)
+    path = filename.replace('\\', '/')
+    for lib in LIBRARIES:
+        if f"/{lib}/" in path:
+            return lib
+    return os.path.basename(path)
+
+
+class StackSampler:
+    """Samples Python stacks via sys._current_frames().
+
+    thread_ids limits sampling to those threads (None = every thread).
+    """
+
+    def __init__(self, interval_s, thread_ids=None):
+        self.interval_s = interval_s
+        self.thread_ids = None if thread_ids is None else frozenset(thread_ids)
+        self.lock = threading.Lock()
+        self.stacks = Counter()
+        self.samples = 0
+        self.started_at = None
+        self.stopped_at = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+        self.stopped_at = time.time()
+        return self
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval_s):
+            taken = []
+            for tid, frame in sys._current_frames().items():
+                if tid == own or (self.thread_ids is not None and tid not in self.thread_ids):
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_key(frame))
+                    frame = frame.f_back
+                if not stack or os.path.basename(stack[0][1]) in IDLE_FILES:
+                    continue
+                taken.append(tuple(reversed(stack)))  # Root -> leaf
+            with self.lock:
+                self.samples += 1
+                for stack in taken:
+                    if stack in self.stacks or len(self.stacks) < MAX_STACKS:
+                        self.stacks[stack] += 1
+
+    def attribution(self, app_file, top=15):
+        """Inclusive time per function in app_file (an absolute path), self time per library / module."""
+        app_file = os.path.abspath(app_file)
+        with self.lock:
+            stacks = list(self.stacks.items())
+        total = sum(count for _, count in stacks) or 1
+        app_funcs, self_time = Counter(), Counter()
+        for stack, count in stacks:
+            # Absolute path, so Flask's own flask/app.py doesn't count as ours
+            for name in {name for name, filename, _ in stack if os.path.abspath(filename) == app_file}:
+                app_funcs[name] += count
+            self_time[_category(stack[-1][1], app_file)] += count
+
+        def _pct(counter):
+            return [{'name': k, 'samples': v, 'percent': round(100 * v / total, 2)} for k, v in counter.most_common(top)]
+
+        return {
+            'interval_ms': self.interval_s * 1000,
+            'samples': self.samples,
+            'busy_stacks': total,
+            'app_functions': _pct(app_funcs),
+            'self_time_by_module': _pct(self_time),
+        }
+
+    def to_speedscope(self, name):
+        with self.lock:
+            stacks = list(self.stacks.items())
+        frames, index = [], {}
+        samples, weights = [], []
+        for stack, count in stacks:
+            ids = []
+            for key in stack:
+                if key not in index:
+                    index[key] = len(frames)
+                    frames.append({'name': key[0], 'file': key[1], 'line': key[2]})
+                ids.append(index[key])
+            samples.append(ids)
+            weights.append(count * self.interval_s)
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'name': name,
+            'exporter': 'lungvision-profiling',
+            'shared': {'frames': frames},
+            'profiles': [{
+                'type': 'sampled',
+                'name': name,
+                'unit': 'seconds',
+                'startValue': 0,
+                'endValue': sum(weights),
+                'samples': samples,
+                'weights': weights,
+            }],
+        }
+
+
+class ProfileManager:
+    """app_file: absolute path of the application module whose functions get attributed.
+    worker_threads: names of threads that do work on a request's behalf (e.g. the
+    micro-batcher); per-request sampling covers them plus the request thread only.
+    """
+
+    def __init__(self, out_dir, app_file, path_prefix='/api/predict', background_hz=0.0, worker_threads=()):
+        self.out_dir = out_dir
+        self.app_file = os.path.abspath(app_file)
+        self.worker_threads = tuple(worker_threads)
+        self.path_prefix = path_prefix
+        self.lock = threading.Lock()
+        self.remaining = 0
+        self.mode = 'cprofile'
+        self.background = None
+        os.makedirs(out_dir, exist_ok=True)
+        if background_hz > 0:
+            self.start_background(background_hz)
+
+    # ---------- ARMING ----------
+    def default_mode(self):
+        """cProfile only traces the request thread; with a worker thread (the micro-batcher)
+        running, the inference it does would show up as a wait in Future.result, so sample."""
+        if any(t.name in self.worker_threads for t in threading.enumerate()):
+            return 'sampling'
+        return 'cprofile'
+
+    def arm(self, count, mode=None, path_prefix=None):
+        mode = mode or self.default_mode()
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode '{mode}'. Use one of {PROFILE_MODES}")
+        with self.lock:
+            self.remaining = max(0, int(count))
+            self.mode = mode
+            if path_prefix is not None:
+                self.path_prefix = path_prefix
+        return self.status()
+
+    def claim(self, path, header_mode=None):
+        """Decides whether this request gets profiled; returns the mode or None."""
+        if header_mode:
+            return header_mode if header_mode in PROFILE_MODES else self.default_mode()
+        with self.lock:
+            if self.remaining > 0 and path.startswith(self.path_prefix):
+                self.remaining -= 1
+                return self.mode
+        return None
+
+    # ---------- PER-REQUEST CAPTURE ----------
+    def _request_sampler(self):
+        # Other requests' threads stay out; the batcher is shared, so batches
+        # that include this request may also carry rows from concurrent ones
+        threads = {threading.get_ident()}
+        threads.update(t.ident for t in threading.enumerate() if t.name in self.worker_threads and t.ident)
+        return StackSampler(REQUEST_SAMPLE_INTERVAL_S, thread_ids=threads).start()
+
+    def begin(self, mode):
+        if mode == 'sampling':
+            return ('sampling', self._request_sampler())
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except (ValueError, RuntimeError):
+            # Only one cProfile can be active at a time (3.12+); sample this one instead
+            return ('sampling', self._request_sampler())
+        return ('cprofile', profiler)
+
+    def end(self, handle, path):
+        mode, profiler = handle
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+        slug = path.strip('/').replace('/', '_') or 'root'
+        if mode == 'sampling':
+            profiler.stop()
+            name = f"{stamp}-{slug}.speedscope.json"
+            with open(os.path.join(self.out_dir, name), 'w') as f:
+                json.dump(profiler.to_speedscope(f"{path} @ {stamp}"), f)
+        else:
+            profiler.disable()
+            name = f"{stamp}-{slug}.pstats"
+            profiler.dump_stats(os.path.join(self.out_dir, name))
+        self._prune()
+        return name
+
+    def _prune(self):
+        files = sorted(self.list_profiles(), key=lambda p: p['modified'])
+        for p in files[:-MAX_PROFILES]:
+            try:
+                os.remove(os.path.join(self.out_dir, p['name']))
+            except FileNotFoundError:
+                pass
+
+    def list_profiles(self):
+        out = []
+        for name in os.listdir(self.out_dir):
+            if name.endswith(('.pstats', '.speedscope.json')):
+                st = os.stat(os.path.join(self.out_dir, name))
+                out.append({'name': name, 'bytes': st.st_size, 'modified': st.st_mtime})
+        return sorted(out, key=lambda p: p['modified'], reverse=True)
+
+    # ---------- BACKGROUND SAMPLING ----------
+    def start_background(self, hz):
+        self.stop_background()
+        self.background = StackSampler(1.0 / hz).start()
+
+    def stop_background(self):
+        if self.background is not None:
+            self.background.stop()
+            self.background = None
+
+    def status(self):
+        with self.lock:
+            info = {'armed_requests': self.remaining, 'mode': self.mode, 'path_prefix': self.path_prefix}
+        info['default_mode'] = self.default_mode()
+        info['background'] = self.background.attribution(self.app_file) if self.background else None
+        return info
@@ -0,0 +1,337 @@
+import os
+import json
+import time
+import uuid
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+from compact_tables import REGISTRY_FEATURES, REGISTRY_COLUMNS
+
+# ==========================================
+# COLUMNAR REGISTRY STORE (PARQUET)
+# ==========================================
+# Alternative to patient_registry.csv. Rows go into small Parquet "append
+# segments" under month=YYYY-MM/ partitions; compact() merges a partition's
+# segments into one file once there are enough of them (from a background timer
+# or the CLI, never inside a request). Readers only open the
+# columns they ask for and push Diagnosis / Timestamp filters down to Arrow,
+# which also skips whole month partitions outside the time range.
+#
+# Needs pyarrow (optional: the default registry backend is still the CSV).
+
+COMPACT_AFTER_SEGMENTS = 64
+SEGMENT_PREFIX = 'seg-'
+COMPACTED_PREFIX = 'part-'
+PARTITION_FIELD = 'month'
+MANIFEST_FILE = '_manifest.json'
+LOCK_FILE = '.manifest.lock'
+STALE_LOCK_S = 600  # A lock older than this belongs to a crashed compactor
+RETIRED_GRACE_S = 900  # Compacted-away segments stay on disk this long for in-progress scans
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.parquet
+        return pyarrow
+    except ImportError:
+        raise ImportError("The parquet registry backend needs pyarrow: pip install pyarrow")
+
+
+def registry_schema():
+    pa = _require_pyarrow()
+    fields = [
+        pa.field('Timestamp', pa.timestamp('s')),
+        pa.field('Patient Name', pa.string()),
+        pa.field('Diagnosis', pa.dictionary(pa.int8(), pa.string())),
+        pa.field('Confidence Score', pa.float32()),  # 53.01, not "53.01%"
+    ]
+    fields += [pa.field(f, pa.uint8()) for f in REGISTRY_FEATURES]
+    fields += [pa.field('Name', pa.string()), pa.field('GenderStr', pa.dictionary(pa.int8(), pa.string()))]
+    return pa.schema(fields)
+
+
+def normalize_frame(df):
+    """CSV-style registry rows -> typed columns matching registry_schema()."""
+    df = df.reindex(columns=REGISTRY_COLUMNS).copy()
+    df['Timestamp'] = pd.to_datetime(df['Timestamp'], errors='coerce')
+    df['Confidence Score'] = pd.to_numeric(df['Confidence Score'].astype(str).str.rstrip('%'), errors='coerce').astype('float32')
+    for f in REGISTRY_FEATURES:
+        values = pd.to_numeric(df[f], errors='coerce')
+        # /api/predict doesn't range-check inputs: anything that doesn't fit uint8 becomes NA, not an error
+        df[f] = values.where(values.between(0, 255) & (values % 1 == 0)).astype('UInt8')
+    for col in ['Patient Name', 'Name']:
+        df[col] = df[col].astype('string')
+    for col in ['Diagnosis', 'GenderStr']:
+        df[col] = df[col].astype('category')
+    return df
+
+
+class ParquetRegistry:
+    def __init__(self, root):
+        _require_pyarrow()
+        self.root = root
+        self.lock = threading.Lock()  # In-process only; compaction also takes a per-partition lock file
+        self.compactor = None
+        self._stop_compactor = threading.Event()
+        os.makedirs(root, exist_ok=True)
+
+    # ---------- WRITES ----------
+    def _write_partition(self, df, prefix):
+        """Writes one file per month partition; returns [(part_dir, file name)]."""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        written = []
+        months = df['Timestamp'].dt.strftime('%Y-%m').fillna('unknown')
+        for month, part in df.groupby(months, sort=False):
+            part_dir = os.path.join(self.root, f"{PARTITION_FIELD}={month}")
+            os.makedirs(part_dir, exist_ok=True)
+            name = f"{prefix}{datetime.now().strftime('%Y%m%d%H%M%S%f')}-{uuid.uuid4().hex[:8]}.parquet"
+            tmp = os.path.join(part_dir, f".{name}.tmp")
+            table = pa.Table.from_pandas(part, schema=registry_schema(), preserve_index=False)
+            pq.write_table(table, tmp, compression='zstd')
+            os.replace(tmp, os.path.join(part_dir, name))  # Readers never see half-written files
+            written.append((part_dir, name))
+        return written
+
+    def append(self, records):
+        """records: a dict or list of dicts with REGISTRY_COLUMNS keys."""
+        if isinstance(records, dict):
+            records = [records]
+        df = normalize_frame(pd.DataFrame(records))
+        self._write_partition(df, SEGMENT_PREFIX)  # Compaction happens off the request path
+
+    def import_csv(self, csv_path, chunk_rows=100_000):
+        """One-off migration of an existing patient_registry.csv."""
+        total = 0
+        with self.lock:
+            for chunk in pd.read_csv(csv_path, chunksize=chunk_rows):
+                for part_dir, name in self._write_partition(normalize_frame(chunk), COMPACTED_PREFIX):
+                    with self._partition_lock(part_dir, wait_s=STALE_LOCK_S) as locked:
+                        if not locked:
+                            raise TimeoutError(f"Could not lock {part_dir} to register {name}")
+                        manifest = self._read_manifest(part_dir)
+                        manifest['parts'].append(name)
+                        self._write_manifest(part_dir, manifest)
+                total += len(chunk)
+        print(f"Imported {total} registry rows into {self.root}")
+        return total
+
+    # ---------- MANIFEST ----------
+    # Each partition's MANIFEST_FILE lists the compacted part- files that are live
+    # and the segments they replaced. Compaction swaps it in with one os.replace,
+    # so readers see either the old segments or the new part file, never both.
+    # Replaced segments are deleted only after RETIRED_GRACE_S, so a scan that
+    # started before the swap can still finish reading them.
+    def _read_manifest(self, part_dir):
+        path = os.path.join(part_dir, MANIFEST_FILE)
+        if os.path.exists(path):
+            with open(path) as f:
+                return json.load(f)
+        # Partitions written before manifests existed: every part- file is live
+        parts = sorted(f for f in os.listdir(part_dir) if f.startswith(COMPACTED_PREFIX) and f.endswith('.parquet'))
+        return {'parts': parts, 'retired': {}}
+
+    def _write_manifest(self, part_dir, manifest):
+        tmp = os.path.join(part_dir, f".{MANIFEST_FILE}.{uuid.uuid4().hex[:8]}.tmp")
+        with open(tmp, 'w') as f:
+            json.dump(manifest, f)
+        os.replace(tmp, os.path.join(part_dir, MANIFEST_FILE))
+
+    def _live_files(self, part_dir):
+        manifest = self._read_manifest(part_dir)
+        segments = [s for s in self._segments(part_dir) if s not in manifest['retired']]
+        return [os.path.join(part_dir, f) for f in manifest['parts'] + segments]
+
+    # ---------- COMPACTION ----------
+    def _segments(self, part_dir):
+        return sorted(f for f in os.listdir(part_dir) if f.startswith(SEGMENT_PREFIX) and f.endswith('.parquet'))
+
+    @contextmanager
+    def _partition_lock(self, part_dir, wait_s=0.0):
+        """Lock file shared by every process (workers, CLI) changing this partition's manifest."""
+        lock_path = os.path.join(part_dir, LOCK_FILE)
+        deadline = time.time() + wait_s
+        while True:
+            try:
+                if time.time() - os.path.getmtime(lock_path) > STALE_LOCK_S:
+                    os.remove(lock_path)
+            except OSError:
+                pass
+            try:
+                os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                break
+            except FileExistsError:
+                if time.time() >= deadline:
+                    yield False
+                    return
+                time.sleep(0.1)
+        try:
+            yield True
+        finally:
+            os.remove(lock_path)
+
+    def _collect_garbage(self, part_dir, manifest):
+        """Deletes retired segments and orphaned part- files (crash before the swap) past the grace period."""
+        now, changed = time.time(), False
+        for name, retired_at in list(manifest['retired'].items()):
+            if now - retired_at > RETIRED_GRACE_S:
+                try:
+                    os.remove(os.path.join(part_dir, name))
+                except FileNotFoundError:
+                    pass
+                del manifest['retired'][name]
+                changed = True
+        live = set(manifest['parts'])
+        for name in os.listdir(part_dir):
+            path = os.path.join(part_dir, name)
+            if name.startswith(COMPACTED_PREFIX) and name not in live and now - os.path.getmtime(path) > RETIRED_GRACE_S:
+                os.remove(path)
+        return changed
+
+    def _compact_partition(self, part_dir, min_segments=2):
+        import pyarrow.parquet as pq
+
+        with self._partition_lock(part_dir) as locked:
+            if not locked:
+                return 0  # Another process is compacting this partition
+            manifest = self._read_manifest(part_dir)
+            segments = [s for s in self._segments(part_dir) if s not in manifest['retired']]
+            merged = 0
+            if len(segments) >= min_segments:
+                tables = [pq.read_table(os.path.join(part_dir, s), schema=registry_schema()) for s in segments]
+                df = pd.concat([t.to_pandas() for t in tables], ignore_index=True)
+                written = self._write_partition(normalize_frame(df), COMPACTED_PREFIX)
+                # All rows come from this partition, so this is one file in part_dir
+                manifest['parts'] += [name for _, name in written]
+                manifest['retired'].update({s: time.time() for s in segments})
+                merged = len(segments)
+            if self._collect_garbage(part_dir, manifest) or merged:
+                self._write_manifest(part_dir, manifest)  # The atomic swap
+            return merged
+
+    def compact(self, min_segments=2):
+        """Merges append segments in every partition; safe to run periodically, from any process."""
+        merged = 0
+        with self.lock:
+            for name in sorted(os.listdir(self.root)):
+                part_dir = os.path.join(self.root, name)
+                if os.path.isdir(part_dir):
+                    merged += self._compact_partition(part_dir, min_segments)
+        return merged
+
+    def start_compactor(self, interval_s):
+        """Background timer that compacts partitions with COMPACT_AFTER_SEGMENTS or more segments."""
+        def _run():
+            while not self._stop_compactor.wait(interval_s):
+                try:
+                    merged = self.compact(min_segments=COMPACT_AFTER_SEGMENTS)
+                    if merged:
+                        print(f"Registry compaction merged {merged} segments")
+                except Exception as e:
+                    print(f"Registry compaction failed: {e}")
+
+        self._stop_compactor.clear()
+        self.compactor = threading.Thread(target=_run, name='registry-compactor', daemon=True)
+        self.compactor.start()
+
+    def stop_compactor(self):
+        self._stop_compactor.set()
+
+    # ---------- READS ----------
+    def _dataset(self):
+        import pyarrow.dataset as ds
+        files = self._all_live_files()
+        if not files:
+            return None
+        return ds.dataset(files, format='parquet', partitioning=ds.partitioning(flavor='hive'),
+                          partition_base_dir=self.root)
+
+    def _all_live_files(self):
+        files = []
+        for name in sorted(os.listdir(self.root)):
+            part_dir = os.path.join(self.root, name)
+            if os.path.isdir(part_dir):
+                files += self._live_files(part_dir)
+        return files
+
+    def _filter(self, diagnosis=None, start=None, end=None):
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        expr = None
+
+        def _and(e):
+            return e if expr is None else expr & e
+
+        if diagnosis:
+            values = [diagnosis] if isinstance(diagnosis, str) else list(diagnosis)
+            expr = _and(ds.field('Diagnosis').isin(values))
+        if start is not None:
+            start = pd.Timestamp(start)
+            expr = _and(ds.field(PARTITION_FIELD) >= start.strftime('%Y-%m'))  # Prunes whole partitions
+            expr = _and(ds.field('Timestamp') >= pa.scalar(start.to_pydatetime(), pa.timestamp('s')))
+        if end is not None:
+            end = pd.Timestamp(end)
+            expr = _and(ds.field(PARTITION_FIELD) <= end.strftime('%Y-%m'))
+            expr = _and(ds.field('Timestamp') <= pa.scalar(end.to_pydatetime(), pa.timestamp('s')))
+        return expr
+
+    def scanner(self, columns=None, diagnosis=None, start=None, end=None, batch_size=65_536):
+        dataset = self._dataset()
+        if dataset is None:
+            return None
+        columns = [c for c in (columns or REGISTRY_COLUMNS) if c in REGISTRY_COLUMNS] or REGISTRY_COLUMNS
+        return dataset.scanner(columns=columns, filter=self._filter(diagnosis, start, end),
+                                       batch_size=batch_size)
+
+    def read(self, columns=None, diagnosis=None, start=None, end=None):
+        scanner = self.scanner(columns, diagnosis, start, end)
+        if scanner is None:
+            return pd.DataFrame(columns=columns or REGISTRY_COLUMNS)
+        df = scanner.to_table().to_pandas()
+        if 'Timestamp' in df.columns:
+            # Partitions/segments come back in file order, not insertion order
+            df = df.sort_values('Timestamp', kind='stable', ignore_index=True)
+        return df
+
+    def iter_frames(self, columns=None, diagnosis=None, start=None, end=None):
+        """Record batches as DataFrames, for streaming exports."""
+        scanner = self.scanner(columns, diagnosis, start, end)
+        if scanner is None:
+            return
+        for batch in scanner.to_batches():
+            if batch.num_rows:
+                yield batch.to_pandas()
+
+
+def to_display_frame(df):
+    """Typed registry rows -> the string formats the CSV (and the Records page) use."""
+    df = df.copy()
+    if 'Timestamp' in df.columns:
+        df['Timestamp'] = pd.to_datetime(df['Timestamp']).dt.strftime("%Y-%m-%d %H:%M:%S")
+    if 'Confidence Score' in df.columns:
+        conf = df['Confidence Score'].astype('float64').round(2)
+        df['Confidence Score'] = conf.map(lambda v: None if pd.isna(v) else f"{v}%")
+    return df
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Manage the Parquet patient registry.")
+    parser.add_argument('action', choices=['import', 'compact'])
+    parser.add_argument('--root', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'registry_store'))
+    parser.add_argument('--csv', default='patient_registry.csv', help="Source CSV for 'import'")
+    args = parser.parse_args()
+
+    store = ParquetRegistry(args.root)
+    if args.action == 'import':
+        store.import_csv(args.csv)
+    else:
+        print(f"Compacted {store.compact()} append segments in {args.root}")
@@ -8,6 +8,7 @@ from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestClassifier, VotingClassifier, GradientBoostingClassifier
 from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import accuracy_score
+from feature_store import load_training_data
 
 # ==========================================
 # ⚙️ CONFIGURATION
@@ -128,13 +129,9 @@ print(f"      ✅ Saved strict data to '{OUTPUT_CSV}'")
 # ==========================================
 print("\n🧠 [4/5] Training The Council of AIs...")
 
-target_map = {'Low': 0, 'Medium': 1, 'High': 2}
-if 'Level' in df.columns:
-    df['Level_Num'] = df['Level'].map(target_map)
-
-# Drop non-features safely
-X = df.drop(columns=['Level', 'Level_Num'], errors='ignore')
-y = df['Level_Num']
+# Re-read the repaired CSV through the feature store so training uses the
+# same columns/encoding as every other script (and warms the cache for them)
+X, y = load_training_data(OUTPUT_CSV)
 
 X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
@@ -0,0 +1,231 @@
+import os
+import re
+import json
+import sys
+import hashlib
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+# ==========================================
+# PDF REPORT SERVICE
+# ==========================================
+# Reports are rendered only when someone asks for one. The PDF is keyed by a
+# hash of the prediction result, cached on disk (LRU by last access) and drawn
+# in a separate process so matplotlib never holds up the API threads.
+#
+# The render processes are plain `python report_service.py --worker` children
+# talking JSON lines over stdin/stdout, not multiprocessing workers: those would
+# either fork the multithreaded API process (deadlock-prone mid-matplotlib) or,
+# under spawn, re-run app.py's whole startup as __mp_main__.
+
+REPORT_CACHE_MAX_FILES = 500
+REPORT_CACHE_MAX_BYTES = 200 * 1024 * 1024
+REPORT_WORKERS = 2
+
+# Fields that decide what the report looks like (plot_url etc. are ignored)
+REPORT_FIELDS = ['prediction', 'confidence', 'diet', 'recommendations', 'dashboard', 'patient']
+_EMOJI = re.compile(r"[\U0001F000-\U0001FFFF\u2600-\u27BF\uFE0F\u200D]")
+
+
+def report_key(result):
+    payload = {k: result.get(k) for k in REPORT_FIELDS}
+    canonical = json.dumps(payload, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:32]
+
+
+def _clean(text):
+    # The default PDF font has no emoji glyphs
+    return _EMOJI.sub('', str(text)).strip()
+
+
+def render_report_pdf(result, out_path):
+    """Runs inside a render worker process (see worker_main)."""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import numpy as np
+    from matplotlib.backends.backend_pdf import PdfPages
+
+    dashboard = result.get('dashboard') or {}
+    diet = result.get('diet') or {}
+    patient = result.get('patient') or {}
+    color = diet.get('color', '#333333')
+    tmp_path = f"{out_path}.tmp{os.getpid()}"
+
+    with PdfPages(tmp_path) as pdf:
+        # --- PAGE 1: DIAGNOSIS + RECOMMENDATIONS ---
+        fig = plt.figure(figsize=(8.27, 11.69))  # A4
+        fig.text(0.08, 0.94, 'LungVision AI - Risk Assessment Report', fontsize=18, weight='bold')
+        if patient.get('name'):
+            fig.text(0.08, 0.91, f"Patient: {patient.get('name')}", fontsize=11)
+        fig.text(0.08, 0.86, f"Risk Level: {result.get('prediction', 'N/A')}", fontsize=16, color=color, weight='bold')
+        fig.text(0.08, 0.83, f"Model Confidence: {result.get('confidence', 'N/A')}%", fontsize=12)
+
+        fig.text(0.08, 0.77, _clean(diet.get('title', 'Diet Protocol')), fontsize=13, weight='bold', color=color)
+        fig.text(0.08, 0.74, _clean(diet.get('plain_text', '')), fontsize=10, wrap=True)
+
+        fig.text(0.08, 0.67, 'Recommendations', fontsize=13, weight='bold')
+        y = 0.64
+        for rec in result.get('recommendations') or []:
+            fig.text(0.10, y, f"- {_clean(rec)}", fontsize=10, wrap=True)
+            y -= 0.035
+        fig.text(0.08, 0.04, 'This report is AI-generated decision support, not a medical diagnosis.', fontsize=8, color='#777777')
+        pdf.savefig(fig)
+        plt.close(fig)
+
+        # --- PAGE 2: RADAR + SHAP BAR ---
+        fig = plt.figure(figsize=(8.27, 11.69))
+        radar = dashboard.get('radar') or {}
+        labels, values = radar.get('labels') or [], radar.get('data') or []
+        if labels:
+            ax = fig.add_subplot(2, 1, 1, polar=True)
+            angles = np.linspace(0, 2 * np.pi, len(labels), endpoint=False).tolist()
+            ax.plot(angles + angles[:1], list(values) + list(values[:1]), color=color)
+            ax.fill(angles + angles[:1], list(values) + list(values[:1]), color=color, alpha=0.25)
+            ax.set_xticks(angles)
+            ax.set_xticklabels(labels, fontsize=9)
+            ax.set_ylim(0, 100)
+            ax.set_title('Lifestyle Risk Profile', pad=20)
+
+        bar = dashboard.get('bar') or {}
+        labels, values = bar.get('labels') or [], bar.get('data') or []
+        if labels:
+            ax = fig.add_subplot(2, 1, 2)
+            colors = ['#dc3545' if v > 0 else '#198754' for v in values]
+            ax.barh(labels[::-1], values[::-1], color=colors[::-1])
+            ax.axvline(0, color='#444444', linewidth=0.8)
+            ax.set_xlabel('SHAP Value (Impact on Prediction)')
+            ax.set_title('Top Feature Impacts (Deep Logic)')
+        fig.tight_layout(pad=3)
+        pdf.savefig(fig)
+        plt.close(fig)
+
+    os.replace(tmp_path, out_path)
+    return out_path
+
+
+class RenderWorker:
+    """One long-lived render process, used by one thread at a time."""
+
+    def __init__(self):
+        self.proc = None
+
+    def _start(self):
+        self.proc = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), '--worker'],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, encoding='utf-8',
+        )
+
+    def render(self, result, out_path):
+        if self.proc is None or self.proc.poll() is not None:
+            self._start()
+        try:
+            self.proc.stdin.write(json.dumps({'result': result, 'path': out_path}) + '\n')
+            self.proc.stdin.flush()
+            reply = self.proc.stdout.readline()
+        except (BrokenPipeError, OSError):
+            reply = ''
+        if not reply:
+            self.proc = None
+            raise RuntimeError("Report worker exited while rendering")
+        reply = json.loads(reply)
+        if not reply.get('ok'):
+            raise RuntimeError(f"Report rendering failed: {reply.get('error')}")
+        return out_path
+
+
+def worker_main():
+    """`python report_service.py --worker`: renders one JSON job per stdin line until EOF."""
+    out = sys.stdout
+    sys.stdout = sys.stderr  # Anything the render code prints must not corrupt the replies
+    for line in sys.stdin:
+        job = json.loads(line)
+        try:
+            render_report_pdf(job['result'], job['path'])
+            reply = {'ok': True}
+        except Exception as e:
+            reply = {'ok': False, 'error': str(e)}
+        out.write(json.dumps(reply) + '\n')
+        out.flush()
+
+
+class ReportService:
+    def __init__(self, cache_dir, max_files=REPORT_CACHE_MAX_FILES, max_bytes=REPORT_CACHE_MAX_BYTES, workers=REPORT_WORKERS):
+        self.cache_dir = cache_dir
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.workers = workers
+        self.pool = None  # Created on the first render, so idle workers cost nothing
+        self.local = threading.local()  # Each pool thread drives its own RenderWorker
+        self.lock = threading.Lock()
+        self.in_flight = {}  # key -> Future, so identical concurrent requests render once
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.pdf")
+
+    def _evict(self):
+        # Caller holds self.lock, so no request is between "found in cache" and "opened"
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.pdf'):
+                st = os.stat(os.path.join(self.cache_dir, name))
+                entries.append((st.st_mtime, st.st_size, name))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        while entries and (len(entries) > self.max_files or total > self.max_bytes):
+            _, size, name = entries.pop(0)
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except OSError:
+                pass  # Already gone, or still open for download (Windows)
+            total -= size
+
+    def _render(self, result, path):
+        worker = getattr(self.local, 'worker', None)
+        if worker is None:
+            worker = self.local.worker = RenderWorker()
+        return worker.render(result, path)
+
+    def _open_cached(self, path):
+        # Under self.lock: an open file survives a later eviction of its path
+        try:
+            f = open(path, 'rb')
+        except FileNotFoundError:
+            return None
+        os.utime(path)  # Mark as recently used
+        return f
+
+    def get_pdf(self, result, timeout=60):
+        """Returns (key, open binary file) of the rendered PDF, rendering it if it isn't cached yet.
+
+        The caller owns the file object (send_file closes it).
+        """
+        key = report_key(result)
+        path = self._path(key)
+        with self.lock:
+            f = self._open_cached(path)
+            if f is not None:
+                return key, f
+            future = self.in_flight.get(key)
+            if future is None:
+                if self.pool is None:
+                    self.pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='report')
+                future = self.pool.submit(self._render, result, path)
+                self.in_flight[key] = future
+        try:
+            future.result(timeout=timeout)
+        finally:
+            with self.lock:
+                if self.in_flight.get(key) is future and future.done():
+                    del self.in_flight[key]
+        with self.lock:
+            f = open(path, 'rb')
+            self._evict()
+        return key, f
+
+
+if __name__ == "__main__":
+    if '--worker' in sys.argv:
+        worker_main()
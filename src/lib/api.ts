@@ -46,6 +46,8 @@ export interface PredictionResult {
     };
     recommendations: string[];
     plot_url?: string;
+    model?: string;
+    explanation_note?: string | null;
     dashboard: {
         radar: {
             labels: string[];
@@ -55,7 +57,7 @@ export interface PredictionResult {
             labels: string[];
             data: number[];
         };
-        base_value: number;
+        base_value: number | null;
     };
 }
 
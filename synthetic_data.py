@@ -0,0 +1,175 @@
+import os
+import csv
+import argparse
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from compact_tables import REGISTRY_FEATURES, REGISTRY_COLUMNS
+from booking_service import HOSPITAL_COLUMNS
+
+# ==========================================
+# SYNTHETIC LOAD-DATA GENERATOR
+# ==========================================
+# Vectorized (NumPy) versions of the augment_dataset.py "smart noise", plus
+# registry and hospital-booking rows built on top of them. Everything is
+# generated and written in chunks, so millions of rows never sit in memory
+# at once, and the same --seed (with a fixed --end) always produces the same files.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_FILE = os.path.join(BASE_DIR, 'cancer patient datasets.csv')
+DB_FILE = os.path.join(BASE_DIR, 'doctors_database.csv')
+CHUNK_ROWS = 100_000
+
+SYMPTOM_COLS = [c for c in REGISTRY_FEATURES if c not in ('Age', 'Gender')]
+YEARS_BY_LEVEL = {'High': (10, 26), 'Medium': (5, 16), 'Low': (0, 6)}
+FIRST_NAMES = ['Antony', 'Priya', 'Arjun', 'Anjali', 'Rahul', 'Sneha', 'Vivek', 'Meera', 'Karthik', 'Divya',
+               'Rohan', 'Lakshmi', 'Nikhil', 'Aisha', 'Joseph', 'Fathima', 'Sanjay', 'Neha', 'Thomas', 'Kavya']
+LAST_NAMES = ['Sojan', 'Menon', 'Nair', 'Kumar', 'Sharma', 'George', 'Varghese', 'Das', 'Iyer', 'Pillai']
+APPT_TIMES = ['09:00 AM', '09:30 AM', '10:00 AM', '10:30 AM', '11:00 AM', '11:30 AM', '02:00 PM', '02:30 PM',
+              '03:00 PM', '03:30 PM', '04:00 PM', '04:30 PM']
+PAYMENT_METHODS = ['card', 'upi', 'qr', 'netbanking']
+DEFAULT_SPAN_DAYS = 365  # Default --start is this long before --end
+MAX_APPT_LEAD_DAYS = 60   # Appointments are booked up to this far ahead
+
+
+def chunk_rng(seed, chunk_idx):
+    # One independent stream per chunk: same seed + chunk size -> same rows
+    return np.random.default_rng([seed, chunk_idx])
+
+
+def generate_patients(base, n, rng):
+    """n new patients derived from random real ones (same rules as augment_dataset.py)."""
+    out = base.iloc[rng.integers(0, len(base), n)].reset_index(drop=True)
+    out['Age'] = np.clip(out['Age'].to_numpy() + rng.integers(-2, 3, n), 10, 80)
+    for col in SYMPTOM_COLS:
+        if col in out.columns:
+            out[col] = np.clip(out[col].to_numpy() + rng.integers(-1, 2, n), 1, 8)
+
+    years = np.zeros(n, dtype=np.int64)
+    levels = out['Level'].to_numpy()
+    for level, (low, high) in YEARS_BY_LEVEL.items():
+        mask = levels == level
+        years[mask] = rng.integers(low, high, mask.sum())
+    out['Years of Smoking'] = np.minimum(years, np.maximum(0, out['Age'].to_numpy() - 13))
+    return out
+
+
+def random_names(n, rng):
+    first = np.array(FIRST_NAMES)[rng.integers(0, len(FIRST_NAMES), n)]
+    last = np.array(LAST_NAMES)[rng.integers(0, len(LAST_NAMES), n)]
+    return np.char.add(np.char.add(first, ' '), last)
+
+
+def to_seconds(ts):
+    # Naive wall-clock seconds; pd.to_datetime(..., unit='s') turns them back into the same wall time
+    return int(pd.Timestamp(ts).timestamp())
+
+
+def random_seconds(n, rng, t0, t1):
+    """Sorted timestamps in [t0, t1); write_chunks hands each chunk its own slice of the range."""
+    return np.sort(rng.integers(t0, max(t1, t0 + 1), n))
+
+
+def format_seconds(seconds, fmt="%Y-%m-%d %H:%M:%S"):
+    return pd.to_datetime(seconds, unit='s').strftime(fmt)
+
+
+def random_confidence(levels, rng):
+    # Skewed towards confident predictions, like the real registry
+    return np.round(45 + 55 * rng.beta(5, 1.5, len(levels)), 2)
+
+
+def generate_registry(base, n, rng, t0, t1):
+    patients = generate_patients(base, n, rng)
+    names = random_names(n, rng)
+    out = pd.DataFrame({
+        'Timestamp': format_seconds(random_seconds(n, rng, t0, t1)),
+        'Patient Name': names,
+        'Diagnosis': patients['Level'].to_numpy(),
+        'Confidence Score': np.char.add(random_confidence(patients['Level'], rng).astype(str), '%'),
+    })
+    for f in REGISTRY_FEATURES:
+        out[f] = patients[f].to_numpy()
+    out['Name'] = names
+    out['GenderStr'] = np.where(patients['Gender'].to_numpy() == 1, 'Male', 'Female')
+    return out[REGISTRY_COLUMNS]
+
+
+def generate_hospital(base, n, rng, doctors, t0, t1, first_txn=0):
+    patients = generate_patients(base, n, rng)
+    doc_idx = rng.integers(0, len(doctors), n)
+    booked = random_seconds(n, rng, t0, t1)
+    appt_days = format_seconds(booked + rng.integers(1, MAX_APPT_LEAD_DAYS + 1, n) * 86400, "%Y-%m-%d")
+    out = pd.DataFrame({
+        'Timestamp': format_seconds(booked),
+        'Transaction ID': np.char.add('TXN-SYN', np.arange(first_txn, first_txn + n).astype(str)),
+        'Payment Status': 'Payment Successful',
+        'Patient Name': random_names(n, rng),
+        'Diagnosis': patients['Level'].to_numpy(),
+        'Confidence': np.char.add(random_confidence(patients['Level'], rng).astype(str), '%'),
+        'Doctor Name': doctors['Name'].to_numpy()[doc_idx],
+        'Specialty': doctors['Specialty'].to_numpy()[doc_idx],
+        'Appt Date': appt_days,
+        'Appt Time': np.array(APPT_TIMES)[rng.integers(0, len(APPT_TIMES), n)],
+        'Fee Paid': '₹500',
+        'Payment Method': np.array(PAYMENT_METHODS)[rng.integers(0, len(PAYMENT_METHODS), n)],
+        'Idempotency Key': '',
+    })
+    return out[HOSPITAL_COLUMNS]
+
+
+def count_data_rows(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return max(0, sum(1 for _ in csv.reader(f)) - 1)
+
+
+def write_chunks(kind, rows, out_path, seed=42, append=False, chunk_rows=CHUNK_ROWS, start=None, end=None):
+    """Timestamps rise across the whole file and never pass `end` (default: now), so a
+    registry pre-filled with these rows can't push incremental_train's cursor into the future.
+    Pass `end` explicitly for byte-identical reruns."""
+    t1 = to_seconds(end if end is not None else datetime.now())
+    t0 = to_seconds(start) if start is not None else t1 - DEFAULT_SPAN_DAYS * 86400
+    if t0 >= t1:
+        raise ValueError("start must be before end")
+    base = pd.read_csv(DATA_FILE)
+    doctors = pd.read_csv(DB_FILE) if kind == 'hospital' else None
+    header = not (append and os.path.exists(out_path))
+    mode = 'a' if append else 'w'
+    # Appended hospital rows continue the TXN-SYN numbering, so repeated runs never reuse an id
+    first_txn = count_data_rows(out_path) if kind == 'hospital' and not header else 0
+
+    written = 0
+    for chunk_idx, offset in enumerate(range(0, rows, chunk_rows)):
+        n = min(chunk_rows, rows - offset)
+        rng = chunk_rng(seed, chunk_idx)
+        # This chunk's slice of [t0, t1), so the file stays in time order
+        c0 = t0 + (t1 - t0) * offset // rows
+        c1 = t0 + (t1 - t0) * (offset + n) // rows
+        if kind == 'patients':
+            chunk = generate_patients(base, n, rng)
+        elif kind == 'registry':
+            chunk = generate_registry(base, n, rng, c0, c1)
+        else:
+            chunk = generate_hospital(base, n, rng, doctors, c0, c1, first_txn=first_txn + offset)
+        chunk.to_csv(out_path, mode=mode, header=header, index=False)
+        mode, header = 'a', False
+        written += n
+        print(f"   -> {written:,}/{rows:,} {kind} rows written", flush=True)
+    print(f"💾 Saved to: {out_path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic LungVision data for load tests.")
+    parser.add_argument('kind', choices=['patients', 'registry', 'hospital'])
+    parser.add_argument('rows', type=int)
+    parser.add_argument('--out', help="Output CSV (default: <kind>_synthetic.csv)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--append', action='store_true', help="Append to an existing file (e.g. patient_registry.csv)")
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    parser.add_argument('--start', help=f"Earliest timestamp (default: {DEFAULT_SPAN_DAYS} days before --end)")
+    parser.add_argument('--end', help="Latest timestamp (default: now; set it for reproducible files)")
+    args = parser.parse_args()
+    write_chunks(args.kind, args.rows, args.out or f"{args.kind}_synthetic.csv",
+                 seed=args.seed, append=args.append, chunk_rows=args.chunk_rows, start=args.start, end=args.end)
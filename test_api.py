@@ -4,6 +4,7 @@ import time
 
 URL = "http://127.0.0.1:5000/api/predict"
 HEALTH_URL = "http://127.0.0.1:5000/api/health"
+READY_URL = "http://127.0.0.1:5000/api/ready"
 
 payload = {
     "age": 30,
@@ -26,6 +27,14 @@ def test_api():
         print(f"Health Status: {h_res.status_code}")
         print(f"Health Body: {h_res.text}")
 
+        # 1.5 Wait for warm-up so the timing below is steady-state
+        for _ in range(60):
+            r_res = requests.get(READY_URL, timeout=5)
+            if r_res.status_code == 200:
+                break
+            print(f"Warming up... {r_res.json().get('progress')}")
+            time.sleep(1)
+
         # 2. Check Prediction
         print(f"Sending request to {URL}...")
         start = time.time()
@@ -6,21 +6,14 @@ from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier, VotingClassifier
 from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import accuracy_score
+from feature_store import load_training_data
 
 # ==========================================
 # 1. LOAD DATA (Safely)
 # ==========================================
 print("Loading dataset...")
-df = pd.read_csv('cancer patient datasets.csv')
-
-# Convert Target to Numbers
-target_map = {'Low': 0, 'Medium': 1, 'High': 2}
-if 'Level' in df.columns:
-    df['Level_Num'] = df['Level'].map(target_map)
-
-# Drop non-features safely (The Fix you know!)
-X = df.drop(columns=['Level', 'Level_Num', 'index', 'Patient Id'], errors='ignore')
-y = df['Level_Num']
+# Canonical features + 0/1/2 targets from the feature store
+X, y = load_training_data('cancer patient datasets.csv')
 
 # Split Data
 X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)